@@ -0,0 +1,157 @@
+from datetime import datetime
+from itertools import chain
+from typing import Dict, List, Optional
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import AlertStatus, ViewState
+from blockchain import get_block_writer, get_chain_cache, iter_blocks
+
+# ViewState row (and lock file name) of the alert view
+VIEW_NAME = "alert_view"
+
+
+# ---------- Materialized Alert View ----------
+# AlertStatus doubles as a projection of the chain: one row per alert with
+# the issue block's fields and its current resolution state, so the open
+# alerts query is an indexed lookup instead of a merge over the chain.
+# Rows are only written from the chain (sync_alert_view), never by the
+# routes that append the blocks.
+
+def _fill(status: AlertStatus, block: Dict) -> AlertStatus:
+    data = block["data"]
+    status.temp_id = data.get("temp_id")
+    status.lat = data.get("lat")
+    status.lon = data.get("lon")
+    status.message = data.get("message")
+    status.timestamp = block["timestamp"]
+    status.block_index = block["index"]
+    status.block_hash = block["hash"]
+    return status
+
+
+def _apply(db: Session, block: Dict, pending: Dict[str, AlertStatus]) -> bool:
+    """Apply one issue or resolution block to the view; returns whether it changed a row."""
+    data = block.get("data")
+    if not isinstance(data, dict) or not data.get("alert_uuid"):
+        return False
+    alert_uuid = data["alert_uuid"]
+    status = pending.get(alert_uuid) or db.get(AlertStatus, alert_uuid)
+    if block.get("type") == "issue":
+        if status is None:
+            status = pending[alert_uuid] = AlertStatus(alert_uuid=alert_uuid, resolved=False)
+            db.add(status)
+        _fill(status, block)
+        return True
+    if block.get("type") == "resolution" and status is not None and not status.resolved:
+        status.resolved = True
+        status.resolved_by = data.get("resolved_by")
+        if data.get("resolved_at"):
+            status.resolved_at = datetime.fromisoformat(data["resolved_at"])
+        status.last_block_hash = block["hash"]
+        return True
+    return False
+
+
+def sync_alert_view(db: Session, appended: Optional[List[Dict]] = None) -> int:
+    """
+    Apply the blocks after the view's high-water mark (ViewState) to the
+    view. The mark only advances in the transaction that commits the rows,
+    so blocks whose rows were lost to a failed commit are applied again on
+    the next pass; without a mark (a new or pre-mark view) the whole chain
+    is reconciled once. `appended` are blocks just written by this process,
+    used instead of re-reading them from the ledger.
+    Returns the number of blocks applied.
+    """
+    with get_chain_cache().ledger.lock(VIEW_NAME):
+        state = db.get(ViewState, VIEW_NAME)
+        start = state.high_water + 1 if state is not None else 0
+        if appended:
+            first = appended[0]["index"]
+            if appended[-1]["index"] < start:
+                return 0
+            blocks = (appended[start - first:] if start >= first
+                      else chain(iter_blocks(start, first), appended))
+        else:
+            blocks = iter_blocks(start)
+
+        applied = 0
+        last = start - 1
+        pending: Dict[str, AlertStatus] = {}
+        for block in blocks:
+            applied += _apply(db, block, pending)
+            last = block["index"]
+        if last < start:
+            return 0
+
+        if state is None:
+            db.add(ViewState(name=VIEW_NAME, high_water=last))
+        else:
+            state.high_water = last
+        # If this fails (e.g. resolve_alert inserted one of the rows
+        # concurrently) the mark does not move and the next pass retries
+        db.commit()
+        return applied
+
+
+def _on_append(blocks: List[Dict]) -> None:
+    with SessionLocal() as db:
+        sync_alert_view(db, blocks)
+
+
+_watching = False
+
+
+def watch_alert_view() -> None:
+    """
+    Keep the view in step with the chain: every commit of this process's
+    block writer applies its blocks (and any earlier ones a failed pass left
+    behind) before the callers waiting on them are woken.
+    """
+    global _watching
+    if not _watching:
+        get_block_writer().add_listener(_on_append)
+        _watching = True
+
+
+def view_row(status: AlertStatus) -> Dict:
+    return {
+        "alert_uuid": status.alert_uuid,
+        "temp_id": status.temp_id,
+        "lat": status.lat,
+        "lon": status.lon,
+        "timestamp": status.timestamp,
+        "blockchain_index": status.block_index,
+        "blockchain_hash": status.block_hash,
+        "resolved": status.resolved,
+        "resolved_at": status.resolved_at,
+        "resolved_by": status.resolved_by,
+        "message": status.message,
+        "type": "issue"
+    }
+
+
+def open_alerts_query(temp_id: Optional[str] = None) -> Select:
+    """Unresolved alerts in chain order, read through ix_alert_status_open."""
+    query = select(AlertStatus).where(
+        AlertStatus.resolved.is_(False),
+        AlertStatus.block_index.isnot(None)
+    )
+    if temp_id is not None:
+        query = query.where(AlertStatus.temp_id == temp_id)
+    return query.order_by(AlertStatus.block_index)
+
+
+def open_alerts_state_query(temp_id: Optional[str] = None) -> Select:
+    """
+    (count, max, sum) of the open alerts' block indexes: changes whenever
+    an alert is opened, resolved or reconciled into the view, so it keys
+    the ETag of responses served from the view.
+    """
+    query = select(func.count(), func.max(AlertStatus.block_index), func.sum(AlertStatus.block_index)).where(
+        AlertStatus.resolved.is_(False),
+        AlertStatus.block_index.isnot(None)
+    )
+    if temp_id is not None:
+        query = query.where(AlertStatus.temp_id == temp_id)
+    return query
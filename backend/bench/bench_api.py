@@ -0,0 +1,384 @@
+"""
+End-to-end API latency and throughput at growing chain sizes.
+
+    python bench/bench_api.py [--chain-sizes 1000,10000,100000,1000000] [--tourists 1000]
+                              [--requests 200] [--concurrency 16]
+                              [--mode inprocess|uvicorn] [--workers 4]
+                              [--out results.json] [--baseline previous.json]
+
+Seeds a throwaway data directory with N tourists and a chain of M blocks
+(issues, most of them resolved, with their alert view rows), then measures
+p50/p95/p99 latency and throughput of:
+
+    register        POST  /register/new
+    login           GET   /tourist/login
+    panic           POST  /panic/
+    alerts_open     GET   /alerts/?unresolved_only=true
+    resolve         PATCH /alerts/{alert_uuid}/resolve
+    validate        GET   /blockchain/validate
+    validate_full   GET   /blockchain/validate?full=true
+
+Chain sizes are run in ascending order; each size extends the chain of the
+previous one. --mode inprocess drives the ASGI app directly (one worker, no
+network); --mode uvicorn starts `uvicorn --workers N` on a local port for
+every size. With --baseline, p95 latencies are compared against an earlier
+result file and endpoints slower by more than --threshold are listed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SCENARIOS = ("register", "login", "panic", "alerts_open", "resolve", "validate", "validate_full")
+
+PASSWORD = "secret"
+SEED_BATCH = 10000
+
+
+# ---------- Seeding ----------
+def seed_tourists(count: int) -> list:
+    """Insert tourists sharing one password hash; returns (tourist_id, temp_id, passport)."""
+    from sqlalchemy import insert
+    from database import SessionLocal
+    from models import Tourist
+    from passwords import hash_password
+
+    password = hash_password(PASSWORD)
+    tourists = [(f"bench-{i}", f"bench-temp-{i}", f"BENCH{i:07d}") for i in range(count)]
+    with SessionLocal() as db:
+        for i in range(0, count, SEED_BATCH):
+            db.execute(insert(Tourist), [
+                {"id": t, "temp_id": temp, "name": f"Tourist {t}", "passport": p, "passport_key": p,
+                 "phone": "9876543210", "password": password}
+                for t, temp, p in tourists[i:i + SEED_BATCH]
+            ])
+        db.commit()
+    return tourists
+
+
+def seed_chain(height: int, tourists: list, open_ratio: float, rng: random.Random) -> int:
+    """
+    Extend the ledger to `height` blocks: issue blocks, each followed by its
+    resolution unless it is left open (open_ratio). Alert view rows are
+    written alongside, as the panic and resolve routes would.
+    """
+    from sqlalchemy import insert
+    from blockchain import chain_height, compute_block_hash
+    from block_writer import new_block
+    from database import SessionLocal
+    from ledger import get_ledger
+    from alert_view import VIEW_NAME
+    from models import AlertStatus, ViewState
+
+    chain_height()  # creates the genesis block on an empty ledger
+    ledger = get_ledger()
+    added = 0
+    with ledger.lock():
+        tip = ledger.refresh()
+        index, prev_hash = tip["index"], tip["hash"]
+        while index + 1 < height:
+            blocks, rows = [], []
+            while len(blocks) < SEED_BATCH and index + 1 < height:
+                _, temp_id, _ = rng.choice(tourists)
+                data = {
+                    "alert_uuid": str(uuid.uuid4()),
+                    "temp_id": temp_id,
+                    "lat": round(rng.uniform(8.0, 34.0), 6),
+                    "lon": round(rng.uniform(68.0, 97.0), 6),
+                    "message": "bench",
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "sos": False,
+                }
+                index += 1
+                issue = new_block(index, prev_hash, data, "issue")
+                issue["hash"] = prev_hash = compute_block_hash(issue)
+                blocks.append(issue)
+                row = {"alert_uuid": data["alert_uuid"], "resolved": False, "temp_id": temp_id,
+                       "lat": data["lat"], "lon": data["lon"], "message": data["message"],
+                       "timestamp": issue["timestamp"], "block_index": index, "block_hash": issue["hash"]}
+
+                if rng.random() >= open_ratio and index + 1 < height:
+                    now = datetime.now(timezone.utc)
+                    index += 1
+                    resolution = new_block(index, prev_hash, {
+                        "alert_uuid": data["alert_uuid"], "temp_id": temp_id, "resolved": True,
+                        "resolved_by": "bench", "resolved_at": now.isoformat(),
+                    }, "resolution")
+                    resolution["hash"] = prev_hash = compute_block_hash(resolution)
+                    blocks.append(resolution)
+                    row.update(resolved=True, resolved_at=now, resolved_by="bench",
+                               last_block_hash=resolution["hash"])
+                rows.append(row)
+
+            ledger.append_many(blocks)
+            with SessionLocal() as db:
+                db.execute(insert(AlertStatus), rows)
+                db.commit()
+            added += len(blocks)
+        # The view rows above are complete, so startup need not reconcile them
+        with SessionLocal() as db:
+            db.merge(ViewState(name=VIEW_NAME, high_water=index))
+            db.commit()
+    return added
+
+
+def open_alerts(limit: int) -> list:
+    from sqlalchemy import select
+    from database import SessionLocal
+    from models import AlertStatus
+
+    with SessionLocal() as db:
+        return list(db.scalars(
+            select(AlertStatus.alert_uuid).where(AlertStatus.resolved.is_(False))
+            .order_by(AlertStatus.block_index.desc()).limit(limit)
+        ))
+
+
+# ---------- Load Generation ----------
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def run_scenario(client, requests: list, concurrency: int) -> dict:
+    """Send (method, url, kwargs) requests with `concurrency` in flight; returns latency stats."""
+    latencies, errors = [], 0
+    position = 0
+
+    async def worker():
+        nonlocal position, errors
+        while position < len(requests):
+            method, url, kwargs = requests[position]
+            position += 1
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(requests)))))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+    }
+
+
+def build_requests(scenario: str, count: int, tourists: list, alerts: list, run_id: str,
+                   rng: random.Random) -> list:
+    if scenario == "register":
+        return [("POST", "/register/new", {"json": {
+            "name": f"Tourist {i}", "email": f"{run_id}-{i}@example.com", "phone": "9876543210",
+            "passport": f"R{run_id}{i:06d}", "password": PASSWORD, "itinerary": "Mumbai -> Goa",
+        }}) for i in range(count)]
+    if scenario == "login":
+        return [("GET", "/tourist/login", {"params": {"passport": rng.choice(tourists)[2], "password": PASSWORD}})
+                for _ in range(count)]
+    if scenario == "panic":
+        return [("POST", "/panic/", {"json": {
+            "tourist_id": rng.choice(tourists)[0], "lat": round(rng.uniform(8.0, 34.0), 6),
+            "lon": round(rng.uniform(68.0, 97.0), 6), "message": "bench",
+        }}) for _ in range(count)]
+    if scenario == "alerts_open":
+        return [("GET", "/alerts/", {"params": {"unresolved_only": "true"}})] * count
+    if scenario == "resolve":
+        return [("PATCH", f"/alerts/{alert_uuid}/resolve", {"params": {"resolved_by": "bench"}})
+                for alert_uuid in alerts[:count]]
+    if scenario == "validate":
+        return [("GET", "/blockchain/validate", {})] * count
+    if scenario == "validate_full":
+        return [("GET", "/blockchain/validate", {"params": {"full": "true"}})] * count
+    raise ValueError(scenario)
+
+
+async def run_all(client, args, tourists: list, chain_blocks: int, rng: random.Random) -> dict:
+    results = {}
+    for scenario in args.scenarios:
+        count = args.full_requests if scenario in ("alerts_open", "validate_full") else args.requests
+        alerts = open_alerts(count) if scenario == "resolve" else []
+        requests = build_requests(scenario, count, tourists, alerts, f"{chain_blocks}x", rng)
+        if scenario in ("alerts_open", "validate"):
+            # First call pays the cold paths (cache load, validation from the last checkpoint)
+            await run_scenario(client, requests[:1], 1)
+        results[scenario] = await run_scenario(client, requests, args.concurrency)
+        print(f"  {scenario:<14} {json.dumps(results[scenario])}", file=sys.stderr)
+    return results
+
+
+# ---------- Servers ----------
+async def bench_inprocess(args, tourists: list, chain_blocks: int, rng: random.Random) -> dict:
+    import httpx
+    import main as app_main
+
+    app = app_main.app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.05)
+            return {"startup": app_main.STARTUP.status(),
+                    "endpoints": await run_all(client, args, tourists, chain_blocks, rng)}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def bench_uvicorn(args, tourists: list, chain_blocks: int, rng: random.Random) -> dict:
+    import httpx
+
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=os.getcwd(), env=env,
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with {server.returncode}")
+                try:
+                    if (await client.get("/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.2)
+            startup = time.perf_counter() - started
+            return {"startup_seconds": round(startup, 3),
+                    "endpoints": await run_all(client, args, tourists, chain_blocks, rng)}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+# ---------- Regression Check ----------
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Endpoints whose p95 grew by more than `threshold` against the baseline run of the same chain size."""
+    previous = {run["chain_blocks"]: run["endpoints"] for run in baseline.get("runs", [])}
+    regressions = []
+    for run in results["runs"]:
+        for scenario, stats in run["endpoints"].items():
+            before = previous.get(run["chain_blocks"], {}).get(scenario)
+            if not before or not before["p95_ms"]:
+                continue
+            ratio = stats["p95_ms"] / before["p95_ms"]
+            if ratio > 1 + threshold:
+                regressions.append({"chain_blocks": run["chain_blocks"], "endpoint": scenario,
+                                    "p95_ms": stats["p95_ms"], "baseline_p95_ms": before["p95_ms"],
+                                    "ratio": round(ratio, 2)})
+    return regressions
+
+
+async def run_sizes(args, tourists: list, rng: random.Random) -> list:
+    # One event loop for all sizes: the async engine's pooled connections are bound to it
+    bench = bench_uvicorn if args.mode == "uvicorn" else bench_inprocess
+    runs = []
+    for size in sorted(args.chain_sizes):
+        t0 = time.perf_counter()
+        added = seed_chain(size, tourists, args.open_ratio, rng)
+        seed_seconds = time.perf_counter() - t0
+        print(f"chain {size}: seeded {added} blocks in {seed_seconds:.1f}s", file=sys.stderr)
+
+        run = {"chain_blocks": size, "seed_seconds": round(seed_seconds, 3)}
+        run.update(await bench(args, tourists, size, rng))
+        runs.append(run)
+
+    # Pooled aiosqlite connections run on non-daemon threads
+    from database import async_engine
+    await async_engine.dispose()
+    return runs
+
+
+def main(args):
+    os.environ["PASSWORD_SCRYPT_N"] = str(args.scrypt_n)
+    tmp = tempfile.mkdtemp(prefix="bench-api-")
+    os.makedirs(os.path.join(tmp, "data"))
+    os.chdir(tmp)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from database import init_db
+
+    init_db()
+
+    rng = random.Random(args.seed)
+    t0 = time.perf_counter()
+    tourists = seed_tourists(args.tourists)
+    print(f"seeded {args.tourists} tourists in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+    results = {
+        "mode": args.mode,
+        "workers": args.workers if args.mode == "uvicorn" else 1,
+        "concurrency": args.concurrency,
+        "tourists": args.tourists,
+        "requests": args.requests,
+        "open_ratio": args.open_ratio,
+        "python": sys.version.split()[0],
+        "cpus": os.cpu_count(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+    }
+    results["runs"] = asyncio.run(run_sizes(args, tourists, rng))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["regressions"] = compare(results, json.load(f), args.threshold)
+
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chain-sizes", type=lambda v: [int(x) for x in v.split(",")], default=[1000, 10000],
+                        help="comma-separated chain lengths, e.g. 1000,10000,100000,1000000")
+    parser.add_argument("--tourists", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--full-requests", type=int, default=10,
+                        help="requests for the endpoints whose cost grows with the chain (alerts_open, validate_full)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", type=lambda v: v.split(","), default=list(SCENARIOS),
+                        help="comma-separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--open-ratio", type=float, default=0.05, help="share of seeded alerts left unresolved")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="uvicorn workers")
+    parser.add_argument("--scrypt-n", type=int, default=2 ** 14)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="also write the JSON results to this file")
+    parser.add_argument("--baseline", help="earlier --out file to compare p95 latencies against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p95 slowdown before flagging")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    main(args)
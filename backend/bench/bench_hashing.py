@@ -0,0 +1,73 @@
+"""
+Block hashing and verification cost per hash format and payload size.
+
+    python bench/bench_hashing.py [--blocks 20000] [--payloads 100,1000,10000,100000]
+
+Builds chains of blocks whose message is --payloads bytes long in format 1
+(whole-block JSON hash) and format 2 (data digest + header hash), then
+times creating them, verifying them fully and, for format 2, verifying
+the headers only.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _chain(count: int, payload: int, version: int):
+    from block_hash import compute_block_hash, seal_block
+
+    message = "x" * payload
+    prev_hash = "0"
+    blocks = []
+    for i in range(count):
+        block = seal_block({
+            "index": i,
+            "timestamp": "2025-01-01T00:00:00+00:00",
+            "type": "issue",
+            "data": {"alert_uuid": f"alert-{i}", "temp_id": "temp", "lat": 19.0, "lon": 72.8, "message": message},
+            "prev_hash": prev_hash,
+        }, version)
+        block["hash"] = prev_hash = compute_block_hash(block)
+        blocks.append(block)
+    return blocks
+
+
+def _rate(count: int, seconds: float) -> dict:
+    return {"seconds": round(seconds, 3), "blocks_per_sec": round(count / seconds), "us_per_block": round(seconds / count * 1e6, 2)}
+
+
+def main(count: int, payloads: list):
+    sys.path.insert(0, BACKEND_DIR)
+    from chain_audit import verify_blocks
+
+    results = {"blocks": count, "runs": []}
+    for payload in payloads:
+        run = {"payload_bytes": payload}
+        for version in (1, 2):
+            t0 = time.perf_counter()
+            blocks = _chain(count, payload, version)
+            created = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            verify_blocks(blocks)
+            verified = time.perf_counter() - t0
+            run[f"v{version}"] = {"create": _rate(count, created), "verify": _rate(count, verified)}
+
+            if version == 2:
+                t0 = time.perf_counter()
+                verify_blocks(blocks, check_data=False)
+                run["v2"]["verify_headers"] = _rate(count, time.perf_counter() - t0)
+        results["runs"].append(run)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=20000)
+    parser.add_argument("--payloads", type=lambda v: [int(x) for x in v.split(",")], default=[100, 1000, 10000, 100000])
+    args = parser.parse_args()
+    main(args.blocks, args.payloads)
@@ -0,0 +1,94 @@
+"""
+Ledger size and read cost per record encoding.
+
+    python bench/bench_ledger.py [--blocks 50000] [--lookups 2000] [--range 100]
+
+Writes the same chain in every available encoding (msgpack is skipped when
+the package is not installed), then times random get_block lookups,
+short range reads and a full scan through the offset index.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _chain(count: int):
+    from block_hash import compute_block_hash
+    from block_writer import new_block
+
+    prev_hash = "0"
+    for i in range(count):
+        block = new_block(i, prev_hash, {"alert_uuid": f"alert-{i}", "temp_id": "temp", "lat": 19.07,
+                                         "lon": 72.87, "message": "Need help near the station"}, "issue")
+        block["hash"] = prev_hash = compute_block_hash(block)
+        yield block
+
+
+def _us(seconds: float, count: int) -> float:
+    return round(seconds / count * 1e6, 2)
+
+
+def main(count: int, lookups: int, span: int, seed: int):
+    sys.path.insert(0, BACKEND_DIR)
+    import ledger as ledger_mod
+    from ledger import Ledger
+
+    encodings = ["json"] + (["msgpack"] if ledger_mod.msgpack is not None else [])
+    blocks = list(_chain(count))
+    rng = random.Random(seed)
+    indexes = [rng.randrange(count) for _ in range(lookups)]
+    starts = [rng.randrange(max(count - span, 1)) for _ in range(lookups)]
+
+    results = {"blocks": count, "encodings": {}}
+    tmp = tempfile.mkdtemp(prefix="bench_ledger_")
+    try:
+        for encoding in encodings:
+            ledger = Ledger(os.path.join(tmp, encoding), fsync="never", encoding=encoding)
+            t0 = time.perf_counter()
+            for i in range(0, count, 256):
+                ledger.append_many(blocks[i:i + 256])
+            written = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            for index in indexes:
+                ledger.get_block(index)
+            got = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            for start in starts:
+                for _ in ledger.iter_blocks(start, start + span):
+                    pass
+            ranged = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            scanned = sum(1 for _ in ledger.iter_blocks())
+            scan = time.perf_counter() - t0
+
+            results["encodings"][encoding] = {
+                "bytes": ledger.disk_size(),
+                "bytes_per_block": round(ledger.disk_size() / count, 1),
+                "append_us_per_block": _us(written, count),
+                "get_block_us": _us(got, lookups),
+                f"range_{span}_us": _us(ranged, lookups),
+                "scan_us_per_block": _us(scan, scanned),
+            }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=50000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--range", type=int, default=100, dest="span")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    main(args.blocks, args.lookups, args.span, args.seed)
@@ -0,0 +1,75 @@
+"""
+Location ping ingestion: HTTP batches into the buffer, then bulk flushes.
+
+    python bench/bench_locations.py [--tourists 5000] [--seconds 10] [--batch 500]
+
+Runs the app in-process against a throwaway data directory and posts
+batches of pings (every tourist moving) as fast as possible, then
+reports ingest rate and how long the flusher needs per flush.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def main(tourists: int, seconds: float, batch: int):
+    tmp = tempfile.mkdtemp(prefix="bench-locations-")
+    os.makedirs(os.path.join(tmp, "data"))
+    os.chdir(tmp)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from fastapi.testclient import TestClient
+    import main as app_main
+    from database import SessionLocal, init_db
+    from location_buffer import get_location_buffer
+    from models import Tourist
+
+    init_db()
+    ids = [f"bench-{i}" for i in range(tourists)]
+    with SessionLocal() as db:
+        db.add_all(Tourist(id=t, name=t, passport=t, passport_key=t, temp_id=t, phone="0") for t in ids)
+        db.commit()
+
+    rng = random.Random(1)
+    sent = 0
+    with TestClient(app_main.app) as client:
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            pings = [{"tourist_id": rng.choice(ids), "lat": rng.uniform(8, 37), "lon": rng.uniform(68, 97)}
+                     for _ in range(batch)]
+            assert client.post("/locations/batch", json={"pings": pings}).status_code == 202
+            sent += batch
+        elapsed = time.perf_counter() - t0
+
+        buffer = get_location_buffer()
+        t1 = time.perf_counter()
+        buffer.flush()
+        drain = time.perf_counter() - t1
+        stats = buffer.stats()
+
+    print(json.dumps({
+        "tourists": tourists,
+        "batch": batch,
+        "pings": sent,
+        "ingest_pings_per_sec": round(sent / elapsed),
+        "final_drain_seconds": round(drain, 3),
+        "flushes": stats["flushes"],
+        "last_flush_ms": stats["last_flush_ms"],
+        "history_written": stats["history_written"],
+        "flush_interval": stats["interval"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tourists", type=int, default=5000)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    main(args.tourists, args.seconds, args.batch)
@@ -0,0 +1,74 @@
+"""
+Nearby-alert queries over a large set of open alerts.
+
+    python bench/bench_nearby.py [--alerts 1000000] [--queries 200]
+
+Builds a GeoGrid of random alerts spread over India and times radius
+queries against a brute-force haversine scan of every alert.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from geo_index import GeoGrid, haversine_km, np  # noqa: E402
+
+LAT_RANGE = (8.0, 37.0)
+LON_RANGE = (68.0, 97.0)
+
+
+def main(alerts: int, queries: int, radii, cell_deg: float, brute_queries: int):
+    rng = random.Random(42)
+    points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(alerts)]
+
+    grid = GeoGrid(cell_deg)
+    t0 = time.perf_counter()
+    for i, (lat, lon) in enumerate(points):
+        grid.add(i, lat, lon, i)
+    build = time.perf_counter() - t0
+
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    centers = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(queries)]
+
+    results = {"alerts": alerts, "cell_deg": cell_deg, "numpy": np is not None,
+               "build_seconds": round(build, 2), "queries": []}
+    for radius in radii:
+        t0 = time.perf_counter()
+        found = sum(len(grid.nearby(lat, lon, radius, limit=100)) for lat, lon in centers)
+        grid_ms = (time.perf_counter() - t0) / len(centers) * 1000
+
+        t0 = time.perf_counter()
+        for lat, lon in centers[:brute_queries]:
+            distances = haversine_km(lat, lon, lats, lons)
+            sorted(d for d in distances if d <= radius)[:100]
+        brute_ms = (time.perf_counter() - t0) / brute_queries * 1000
+
+        # Same answer as the scan
+        lat, lon = centers[0]
+        expected = sorted(i for i, d in enumerate(haversine_km(lat, lon, lats, lons)) if d <= radius)
+        assert sorted(k for _, k, _ in grid.nearby(lat, lon, radius)) == expected
+
+        results["queries"].append({
+            "radius_km": radius,
+            "avg_hits": round(found / len(centers), 1),
+            "grid_ms": round(grid_ms, 3),
+            "scan_ms": round(brute_ms, 1),
+            "speedup": round(brute_ms / grid_ms, 1),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radii", type=float, nargs="+", default=[1, 5, 25, 100])
+    parser.add_argument("--cell-deg", type=float, default=0.1)
+    parser.add_argument("--brute-queries", type=int, default=3)
+    args = parser.parse_args()
+    main(args.alerts, args.queries, args.radii, args.cell_deg, args.brute_queries)
@@ -0,0 +1,62 @@
+"""
+Login throughput of the password KDF at different cost settings.
+
+    python bench/bench_passwords.py [--logins 64] [--workers 4]
+
+For each cost a batch of verify_password calls is pushed through a pool
+of --workers threads, the same way /tourist/login runs them, and the
+sustained logins per second and per-login latency are reported.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from passwords import hash_password, verify_password  # noqa: E402
+
+SCRYPT_COSTS = [2 ** 12, 2 ** 13, 2 ** 14, 2 ** 15, 2 ** 16]
+PBKDF2_COSTS = [100000, 300000, 600000, 1200000]
+
+
+def run(kdf: str, cost: int, logins: int, workers: int) -> dict:
+    if kdf == "scrypt":
+        stored = hash_password("correct horse", kdf="scrypt", n=cost)
+    else:
+        stored = hash_password("correct horse", kdf="pbkdf2", iterations=cost)
+
+    def login(_):
+        t0 = time.perf_counter()
+        assert verify_password("correct horse", stored)
+        return time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        t0 = time.perf_counter()
+        latencies = sorted(pool.map(login, range(logins)))
+        elapsed = time.perf_counter() - t0
+
+    return {
+        "kdf": kdf,
+        "cost": cost,
+        "logins_per_sec": round(logins / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--kdf", choices=["scrypt", "pbkdf2", "both"], default="both")
+    args = parser.parse_args()
+
+    results = []
+    if args.kdf in ("scrypt", "both"):
+        results += [run("scrypt", n, args.logins, args.workers) for n in SCRYPT_COSTS]
+    if args.kdf in ("pbkdf2", "both"):
+        results += [run("pbkdf2", i, args.logins, args.workers) for i in PBKDF2_COSTS]
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,64 @@
+"""
+Registration throughput: one /register/new request per tourist vs /register/bulk.
+
+    python bench/bench_register.py [--group 200] [--scrypt-n 16384]
+
+Runs the app in-process against a throwaway data directory. Both paths pay
+the same password KDF cost per tourist; lower --scrypt-n to see the
+per-request overhead the bulk endpoint removes.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _tourists(prefix: str, count: int):
+    return [{
+        "name": f"Tourist {i}",
+        "email": f"{prefix}{i}@example.com",
+        "phone": "9876543210",
+        "passport": f"{prefix.upper()}{i:07d}",
+        "password": "secret",
+        "itinerary": "Mumbai -> Goa",
+    } for i in range(count)]
+
+
+def main(group: int, scrypt_n: int):
+    os.environ["PASSWORD_SCRYPT_N"] = str(scrypt_n)
+    tmp = tempfile.mkdtemp(prefix="bench-register-")
+    os.makedirs(os.path.join(tmp, "data"))
+    os.chdir(tmp)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from fastapi.testclient import TestClient
+    import main as app_main
+
+    results = {"group": group, "scrypt_n": scrypt_n}
+    with TestClient(app_main.app) as client:
+        t0 = time.perf_counter()
+        for tourist in _tourists("single", group):
+            assert client.post("/register/new", json=tourist).status_code == 200
+        single = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        response = client.post("/register/bulk", json=_tourists("bulk", group))
+        bulk = time.perf_counter() - t0
+        assert response.status_code == 200 and response.json()["created"] == group, response.text
+
+    results["single"] = {"seconds": round(single, 3), "tourists_per_sec": round(group / single, 1)}
+    results["bulk"] = {"seconds": round(bulk, 3), "tourists_per_sec": round(group / bulk, 1)}
+    results["speedup"] = round(single / bulk, 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--group", type=int, default=200)
+    parser.add_argument("--scrypt-n", type=int, default=2 ** 14)
+    args = parser.parse_args()
+    main(args.group, args.scrypt_n)
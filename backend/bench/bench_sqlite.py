@@ -0,0 +1,116 @@
+"""
+Compare SQLite engine profiles under concurrent readers and writers.
+
+    python bench/bench_sqlite.py [--seconds 5] [--readers 8] [--writers 4]
+
+Each profile gets a fresh database file seeded with tourists and reports.
+Readers look up reports by tourist_id while writers insert new reports,
+which is the mix the panic and tourist routes produce.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from database import Base, SQLITE_PROFILES, create_db_engine  # noqa: E402
+from models import Report, Tourist  # noqa: E402
+
+
+def _seed(Session, tourists: int):
+    ids = [str(uuid.uuid4()) for _ in range(tourists)]
+    with Session() as db:
+        for i, tid in enumerate(ids):
+            db.add(Tourist(id=tid, name=f"t{i}", passport=f"P{i}", temp_id=f"TMP{i}", phone="0"))
+            db.add(Report(tourist_id=tid, title="seed"))
+        db.commit()
+    return ids
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def run_profile(profile: str, seconds: float, readers: int, writers: int, tourists: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/bench.db", profile)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        ids = _seed(Session, tourists)
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        latencies = {"read": [], "write": []}
+        errors = []
+
+        def reader(n):
+            local = []
+            i = n
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                with Session() as db:
+                    db.execute(select(Report).where(Report.tourist_id == ids[i % len(ids)])).all()
+                local.append(time.perf_counter() - t0)
+                i += readers
+            with lock:
+                latencies["read"].extend(local)
+
+        def writer(n):
+            local = []
+            i = n
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    with Session() as db:
+                        tid = ids[i % len(ids)]
+                        db.add(Report(tourist_id=tid, title="bench"))
+                        db.commit()
+                except Exception as exc:  # "database is locked" under the stock profile
+                    errors.append(str(exc).splitlines()[0])
+                local.append(time.perf_counter() - t0)
+                i += writers
+            with lock:
+                latencies["write"].extend(local)
+
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+        threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        engine.dispose()
+
+    result = {"profile": profile, "errors": len(errors)}
+    for kind, samples in latencies.items():
+        result[kind] = {
+            "ops_per_sec": round(len(samples) / seconds, 1),
+            "p50_ms": round(_percentile(samples, 0.50) * 1000, 2),
+            "p99_ms": round(_percentile(samples, 0.99) * 1000, 2),
+        }
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--tourists", type=int, default=2000)
+    parser.add_argument("--profiles", nargs="+", default=list(SQLITE_PROFILES), choices=list(SQLITE_PROFILES))
+    args = parser.parse_args()
+
+    results = [run_profile(p, args.seconds, args.readers, args.writers, args.tourists) for p in args.profiles]
+    print(json.dumps(results, indent=2))
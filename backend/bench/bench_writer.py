@@ -0,0 +1,186 @@
+"""
+Concurrent appends from several worker processes must never fork the chain.
+
+    python bench/bench_writer.py [--workers 4] [--requests 200] [--tourists 20]
+
+Starts `uvicorn --workers N` on a throwaway data directory, fires all panic
+requests at once, then stops the server and checks the ledger:
+
+    * block indexes are unique and contiguous from genesis
+    * every block's prev_hash is the hash of the block before it
+    * every accepted alert is in exactly one issue block, under the hash
+      the request returned, and has its alert view row
+    * a full validation (chain_audit.validate_full) passes
+
+Prints the results as JSON and exits with status 1 when any check fails.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def seed_tourists(count: int) -> list:
+    from sqlalchemy import insert
+    from database import SessionLocal
+    from models import Tourist
+
+    tourists = [f"writer-{i}" for i in range(count)]
+    with SessionLocal() as db:
+        db.execute(insert(Tourist), [
+            {"id": t, "temp_id": f"{t}-temp", "name": f"Tourist {t}", "passport": f"W{i:07d}",
+             "passport_key": f"W{i:07d}", "phone": "9876543210"}
+            for i, t in enumerate(tourists)
+        ])
+        db.commit()
+    return tourists
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ---------- Load ----------
+async def fire(port: int, tourists: list, count: int) -> list:
+    """Send `count` panic requests at once; returns (status, body) per request."""
+    import httpx
+
+    limits = httpx.Limits(max_connections=count, max_keepalive_connections=count)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+        async def panic(i: int):
+            response = await client.post("/panic/", json={
+                "tourist_id": tourists[i % len(tourists)], "lat": 19.07, "lon": 72.87, "message": f"writer {i}",
+            })
+            return response.status_code, response.json()
+        return await asyncio.gather(*(panic(i) for i in range(count)))
+
+
+async def wait_ready(port: int, server: subprocess.Popen) -> None:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {server.returncode}")
+            try:
+                if (await client.get("/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+
+
+def run_server(workers: int, tourists: list, count: int) -> dict:
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=os.getcwd(), env=env,
+    )
+    try:
+        asyncio.run(wait_ready(port, server))
+        t0 = time.perf_counter()
+        responses = asyncio.run(fire(port, tourists, count))
+        seconds = time.perf_counter() - t0
+    finally:
+        server.terminate()
+        server.wait()
+    return {"responses": responses, "seconds": seconds}
+
+
+# ---------- Checks ----------
+def check_chain(responses: list) -> dict:
+    from chain_audit import ChainInvalid, get_auditor
+    from database import SessionLocal
+    from ledger import get_ledger
+    from models import AlertStatus
+
+    failures = []
+    accepted = {body["alert_uuid"]: body["blockchain_hash"] for status, body in responses if status == 200}
+    rejected = [status for status, _ in responses if status != 200]
+    if rejected:
+        failures.append(f"{len(rejected)} panic requests failed: {dict(Counter(rejected))}")
+
+    blocks = list(get_ledger().iter_blocks())
+    for position, block in enumerate(blocks):
+        if block["index"] != position:
+            failures.append(f"block at position {position} has index {block['index']}")
+            break
+    duplicates = [index for index, n in Counter(b["index"] for b in blocks).items() if n > 1]
+    if duplicates:
+        failures.append(f"duplicate block indexes (fork): {duplicates[:10]}")
+    for prev, block in zip(blocks, blocks[1:]):
+        if block["prev_hash"] != prev["hash"]:
+            failures.append(f"block {block['index']} does not link to block {prev['index']}")
+            break
+
+    issues = Counter(b["data"]["alert_uuid"] for b in blocks if b["type"] == "issue")
+    hashes = {b["data"]["alert_uuid"]: b["hash"] for b in blocks if b["type"] == "issue"}
+    missing = [u for u in accepted if issues[u] == 0]
+    repeated = [u for u in accepted if issues[u] > 1]
+    wrong_hash = [u for u, h in accepted.items() if issues[u] == 1 and hashes[u] != h]
+    for label, uuids in (("missing from the chain", missing), ("written more than once", repeated),
+                         ("stored under another hash", wrong_hash)):
+        if uuids:
+            failures.append(f"{len(uuids)} accepted alerts {label}")
+
+    with SessionLocal() as db:
+        rows = {s.alert_uuid for s in db.query(AlertStatus).filter(AlertStatus.alert_uuid.in_(list(accepted)))}
+    if len(rows) != len(accepted):
+        failures.append(f"{len(accepted) - len(rows)} accepted alerts have no alert view row")
+
+    try:
+        validation = get_auditor().validate_full()
+    except ChainInvalid as e:
+        validation = {"valid": False, "error": str(e)}
+        failures.append(f"full validation failed: {e}")
+
+    return {
+        "accepted": len(accepted),
+        "blocks": len(blocks),
+        "validate_full": validation,
+        "failures": failures,
+    }
+
+
+def main(args) -> int:
+    os.environ["PASSWORD_SCRYPT_N"] = str(2 ** 10)
+    tmp = tempfile.mkdtemp(prefix="bench-writer-")
+    os.makedirs(os.path.join(tmp, "data"))
+    os.chdir(tmp)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from database import init_db
+
+    init_db()
+    tourists = seed_tourists(args.tourists)
+    run = run_server(args.workers, tourists, args.requests)
+    results = {
+        "workers": args.workers,
+        "requests": args.requests,
+        "seconds": round(run["seconds"], 3),
+        "throughput_rps": round(args.requests / run["seconds"], 1) if run["seconds"] else 0.0,
+    }
+    results.update(check_chain(run["responses"]))
+    results["ok"] = not results["failures"]
+    print(json.dumps(results, indent=2))
+    return 0 if results["ok"] else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn workers")
+    parser.add_argument("--requests", type=int, default=200, help="concurrent panic requests")
+    parser.add_argument("--tourists", type=int, default=20)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""
+Batched point-in-zone evaluation.
+
+    python bench/bench_zones.py [--zones 5000] [--positions 100000]
+
+Builds a ZoneIndex of random circle and polygon zones over India and times
+one evaluate() call for a batch of positions (one location ping per
+active tourist) against checking every zone for a sample of positions.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from geo_index import haversine_km, np  # noqa: E402
+from zone_engine import ZoneIndex, points_in_polygon, zone_geometry  # noqa: E402
+
+LAT_RANGE = (8.0, 37.0)
+LON_RANGE = (68.0, 97.0)
+
+
+def _zones(count: int, rng: random.Random):
+    zones = []
+    for i in range(count):
+        lat, lon = rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+        if i % 4 == 0:
+            # Irregular hexagon of a few km
+            polygon = [[lat + rng.uniform(0.01, 0.05) * math.sin(a), lon + rng.uniform(0.01, 0.05) * math.cos(a)]
+                       for a in (k * math.pi / 3 for k in range(6))]
+            lat, lon, radius, polygon = zone_geometry(None, None, None, polygon)
+        else:
+            radius, polygon = rng.uniform(200, 10000), None
+        zones.append({"id": str(i), "name": f"zone {i}", "kind": rng.choice(["restricted", "danger"]),
+                      "lat": lat, "lon": lon, "radius": radius, "polygon": polygon})
+    return zones
+
+
+def _naive(zones, lat, lon):
+    hits = []
+    distances = haversine_km(lat, lon, [z["lat"] for z in zones], [z["lon"] for z in zones])
+    for zone, d in zip(zones, distances):
+        if d * 1000 <= zone["radius"] and (not zone["polygon"] or points_in_polygon([lat], [lon], zone["polygon"])[0]):
+            hits.append(zone["id"])
+    return hits
+
+
+def main(zone_count: int, position_count: int, naive_sample: int):
+    rng = random.Random(7)
+    zones = _zones(zone_count, rng)
+    positions = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(position_count)]
+
+    t0 = time.perf_counter()
+    index = ZoneIndex(zones)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    matches = index.evaluate(positions)
+    evaluate = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for (lat, lon), found in zip(positions[:naive_sample], matches):
+        assert sorted(_naive(zones, lat, lon)) == sorted(z["id"] for z in found)
+    naive = (time.perf_counter() - t0) / naive_sample
+
+    print(json.dumps({
+        "zones": zone_count,
+        "positions": position_count,
+        "numpy": np is not None,
+        "index": index.stats(),
+        "build_seconds": round(build, 3),
+        "evaluate_seconds": round(evaluate, 3),
+        "positions_per_sec": round(position_count / evaluate),
+        "inside_any_zone": sum(1 for m in matches if m),
+        "naive_seconds_per_position": round(naive, 5),
+        "naive_projected_seconds": round(naive * position_count, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--zones", type=int, default=5000)
+    parser.add_argument("--positions", type=int, default=100000)
+    parser.add_argument("--naive-sample", type=int, default=200)
+    args = parser.parse_args()
+    main(args.zones, args.positions, args.naive_sample)
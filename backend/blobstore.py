@@ -0,0 +1,114 @@
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+BLOB_DIR = Path(os.getenv("BLOB_DIR", "data/blobs"))
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_DATA_URL_RE = re.compile(r"^data:(?P<type>[\w.+-]+/[\w.+-]+)?(;[^,]*)?;base64,", re.IGNORECASE)
+
+# Leading bytes used to pick a Content-Type when serving a blob
+_MAGIC = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"RIFF", "image/webp"),
+    (b"%PDF", "application/pdf"),
+)
+
+
+# ---------- Content-Addressed Blob Store ----------
+def is_digest(value: str) -> bool:
+    return bool(_DIGEST_RE.match(value or ""))
+
+
+def blob_path(digest: str) -> Path:
+    """Blobs are sharded by the first two hex digits of their SHA256 digest."""
+    if not is_digest(digest):
+        raise ValueError(f"Invalid blob digest '{digest}'")
+    return BLOB_DIR / digest[:2] / digest
+
+
+def put_blob(data: bytes) -> str:
+    """
+    Store bytes under their SHA256 digest and return the digest. Identical
+    content is stored once.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    path = blob_path(digest)
+    if path.exists():
+        return digest
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A temp file of its own per call: threads and processes storing the
+    # same content at once never write into each other's file
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{digest}.", suffix=".tmp", delete=False) as f:
+        f.write(data)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        # Another writer stored the same content first (e.g. the blob is
+        # open on Windows); the stored copy is identical
+        if not path.exists():
+            raise
+    finally:
+        if os.path.exists(f.name):
+            os.remove(f.name)
+    return digest
+
+
+def decode_base64(value: str) -> Optional[bytes]:
+    """Decode a base64 string or data URL; returns None if it is neither."""
+    value = _DATA_URL_RE.sub("", value.strip(), count=1)
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def put_base64(value: str) -> Optional[str]:
+    """Store a base64 upload as binary and return its digest, or None if it is not base64."""
+    data = decode_base64(value)
+    return put_blob(data) if data else None
+
+
+def content_type(path: Path) -> str:
+    with open(path, "rb") as f:
+        head = f.read(12)
+    for magic, mime in _MAGIC:
+        if head.startswith(magic):
+            return mime
+    return "application/octet-stream"
+
+
+def get_blob(digest: str) -> Optional[Tuple[Path, str]]:
+    """Return (path, content type) for a stored blob, or None."""
+    path = blob_path(digest)
+    if not path.exists():
+        return None
+    return path, content_type(path)
+
+
+# ---------- Move Legacy Report Images ----------
+if __name__ == "__main__":
+    from database import SessionLocal
+    from models import Report
+
+    db = SessionLocal()
+    moved = 0
+    try:
+        for report in db.query(Report).filter(Report.image.isnot(None), Report.image_digest.is_(None)):
+            digest = put_base64(report.image)
+            if digest:
+                report.image_digest = digest
+                report.image = None
+                moved += 1
+        db.commit()
+    finally:
+        db.close()
+    print(f"Moved {moved} report images to {BLOB_DIR}")
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from metrics import ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Blocks buffered per subscriber before it has to catch up from the ledger
+SUBSCRIBER_QUEUE_SIZE = 1024
+
+# Seconds between checks for blocks appended by other worker processes
+TIP_POLL_INTERVAL = 1.0
+
+
+# ---------- In-Process Block Feed ----------
+class BlockFeed:
+    """
+    Fan-out of newly committed blocks to async subscribers (SSE streams).
+
+    publish() is called from the block writer thread and hands blocks to
+    each subscriber's event loop with call_soon_threadsafe. Blocks appended
+    by other worker processes are published by a single tip watcher thread
+    per process (see watch_tip), so subscribers only ever await their
+    queue. Blocks are published in index order and at most once. A
+    subscriber whose queue is full simply misses blocks; streams detect the
+    gap by block index and re-read it from the ledger.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self.last_index: Optional[int] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a queue on the running event loop."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = {s for s in self._subscribers if s[1] is not queue}
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, block: Dict) -> None:
+        try:
+            queue.put_nowait(block)
+        except asyncio.QueueFull:
+            pass
+
+    def publish(self, blocks: List[Dict]) -> None:
+        with self._publish_lock:
+            if self.last_index is not None:
+                blocks = [b for b in blocks if b["index"] > self.last_index]
+            if not blocks:
+                return
+            self.last_index = blocks[-1]["index"]
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for loop, queue in subscribers:
+                for block in blocks:
+                    try:
+                        loop.call_soon_threadsafe(self._offer, queue, block)
+                    except RuntimeError:  # loop closed
+                        self.unsubscribe(queue)
+                        break
+
+    # ---------- Tip Watcher ----------
+    def watch_tip(self, height: Callable[[], int], read: Callable[[int, int], Iterable[Dict]],
+                  interval: float = TIP_POLL_INTERVAL) -> None:
+        """
+        Start the thread that publishes blocks appended by other processes:
+        every `interval` seconds, while anyone is subscribed, it compares
+        `height()` with the last published block and publishes
+        `read(start, stop)`. No-op when it is already running.
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        with self._lock:
+            if self._watcher is None or not self._watcher.is_alive():
+                self._stop.clear()
+                self._watcher = threading.Thread(target=self._watch, args=(height, read, interval),
+                                                 name="block-feed-tip", daemon=True)
+                self._watcher.start()
+
+    def _watch(self, height: Callable[[], int], read: Callable[[int, int], Iterable[Dict]],
+               interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                tip = height() - 1
+                if not self._subscribers or self.last_index is None:
+                    # Nobody to catch up: subscribers replay older blocks themselves
+                    with self._publish_lock:
+                        self.last_index = max(tip, self.last_index if self.last_index is not None else -1)
+                elif tip > self.last_index:
+                    self.publish(list(read(self.last_index + 1, tip + 1)))
+            except Exception:
+                logger.exception("Block feed tip watcher failed")
+                ERRORS.inc(where="block_feed")
+
+    def close(self) -> None:
+        """Stop the tip watcher thread."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+
+block_feed = BlockFeed()
@@ -0,0 +1,148 @@
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from ledger import Ledger
+from chain_cache import ChainCache
+from block_hash import seal_block
+from metrics import ERRORS, stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on blocks written by one group commit
+MAX_BATCH = int(os.getenv("LEDGER_MAX_BATCH", "256"))
+
+
+def new_block(index: int, prev_hash: str, data: Dict, block_type: str) -> Dict:
+    """An unhashed block chained onto prev_hash, with its data digested (block_hash.seal_block)."""
+    return seal_block({
+        "index": index,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "type": block_type,
+        "data": data,
+        "prev_hash": prev_hash
+    })
+
+
+# ---------- Serialized Block Writer ----------
+class BlockWriter:
+    """
+    Single writer thread that owns all appends to the ledger.
+
+    Callers enqueue block data and wait on a future. The writer drains
+    whatever has queued up, chains the blocks onto the current tip under the
+    ledger's cross-process lock and writes them with one append and one
+    fsync (group commit). Each caller still gets back its own block.
+    """
+
+    def __init__(self, ledger: Ledger, cache: ChainCache,
+                 hash_block: Callable[[Dict], str], max_batch: int = MAX_BATCH):
+        self._ledger = ledger
+        self._cache = cache
+        self._hash_block = hash_block
+        self._max_batch = max_batch
+        self._queue: "queue.Queue[Optional[Tuple[Dict, str, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._listeners: List[Callable[[List[Dict]], None]] = []
+        self.batches = 0
+        self.blocks = 0
+
+    def add_listener(self, listener: Callable[[List[Dict]], None]) -> None:
+        """
+        Call `listener(blocks)` from the writer thread after every commit,
+        before the callers waiting on those blocks are woken.
+        """
+        self._listeners.append(listener)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="block-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, data: Dict, block_type: str) -> Future:
+        """Queue a block for writing; the future resolves to the stored block."""
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((data, block_type, future))
+        return future
+
+    def append(self, data: Dict, block_type: str) -> Dict:
+        """Write a block and wait until it is durable."""
+        return self.submit(data, block_type).result()
+
+    def close(self) -> None:
+        """Flush pending blocks and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    # ---------- Writer Thread ----------
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            pending = [item]
+            stop = False
+            while len(pending) < self._max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                pending.append(item)
+
+            self._commit(pending)
+            if stop:
+                return
+
+    def _commit(self, pending: List[Tuple[Dict, str, Future]]) -> None:
+        try:
+            with self._ledger.lock():
+                tip = self._ledger.refresh()
+                blocks = []
+                index, prev_hash = tip["index"], tip["hash"]
+                for data, block_type, _ in pending:
+                    index += 1
+                    with stage_timer("compute_block_hash"):
+                        block = new_block(index, prev_hash, data, block_type)
+                        block["hash"] = prev_hash = self._hash_block(block)
+                    blocks.append(block)
+                with stage_timer("ledger_append"):
+                    self._ledger.append_many(blocks)
+                signature = self._cache.tip_signature()
+        except Exception as e:
+            logger.exception("Block commit failed")
+            ERRORS.inc(where="block_writer")
+            for _, _, future in pending:
+                future.set_exception(e)
+            return
+
+        self._cache.on_append(blocks, signature)
+        self.batches += 1
+        self.blocks += len(blocks)
+        for listener in self._listeners:
+            try:
+                listener(blocks)
+            except Exception:
+                logger.exception("Block listener failed")
+                ERRORS.inc(where="block_listener")
+        for (_, _, future), block in zip(pending, blocks):
+            future.set_result(block)
+
+    def stats(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "blocks": self.blocks,
+            "avg_batch": round(self.blocks / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
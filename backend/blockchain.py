@@ -1,62 +1,190 @@
-import json
+import asyncio
 import hashlib
+import logging
+import threading
+from bisect import bisect_right
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
+from ledger import Ledger, get_ledger, migrate_from_json
+from chain_cache import ChainCache
+from block_writer import BlockWriter, new_block
+from block_hash import compute_block_hash
+from block_feed import block_feed
+from metrics import gauge, stage_timer
 
-CHAIN_PATH = Path("data/blockchain.json")
-
+logger = logging.getLogger(__name__)
 
-# ---------- Shared Hash Function ----------
-def compute_block_hash(block: dict) -> str:
-    """
-    Compute SHA256 hash of a block (excluding the 'hash' field).
-    """
-    block_copy = {k: block[k] for k in block if k != "hash"}
-    block_json = json.dumps(block_copy, sort_keys=True, separators=(",", ":"))
-    return hashlib.sha256(block_json.encode("utf-8")).hexdigest()
+# Legacy single-file chain, imported into the ledger on first use
+CHAIN_PATH = Path("data/blockchain.json")
 
 
 # ---------- Create Genesis Block ----------
+# compute_block_hash (block_hash.py) is re-exported here for existing callers
 def _create_genesis_block() -> dict:
-    block_dict = {
-        "index": 0,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "type": "genesis",          # added type field
-        "data": "genesis",
-        "prev_hash": "0"
-    }
+    block_dict = new_block(0, "0", "genesis", "genesis")
     block_dict["hash"] = compute_block_hash(block_dict)
     return block_dict
 
 
-# ---------- Load or Repair Blockchain ----------
-def load_chain() -> dict:
-    if not CHAIN_PATH.exists():
-        CHAIN_PATH.parent.mkdir(parents=True, exist_ok=True)
-        chain = {"chain": [_create_genesis_block()]}
-        CHAIN_PATH.write_text(json.dumps(chain, indent=2))
-        return chain
-
-    try:
-        content = CHAIN_PATH.read_text()
-        data = json.loads(content) if content.strip() else None
-    except json.JSONDecodeError:
-        data = None
-
-    if not data or "chain" not in data or len(data["chain"]) == 0:
-        data = {"chain": [_create_genesis_block()]}
-        CHAIN_PATH.write_text(json.dumps(data, indent=2))
-        return data
-
-    # Repair genesis block if hash is invalid
-    genesis = data["chain"][0]
+# ---------- Repair Genesis Block ----------
+def repair_genesis(chain: list) -> list:
+    """Fix the genesis block hash of a legacy chain if it is invalid."""
+    genesis = chain[0]
     correct_hash = compute_block_hash(genesis)
     if genesis.get("hash") != correct_hash:
-        print("[INFO] Fixing genesis block hash")
-        data["chain"][0]["hash"] = correct_hash
-        CHAIN_PATH.write_text(json.dumps(data, indent=2))
+        logger.info("Fixing genesis block hash")
+        genesis["hash"] = correct_hash
+    return chain
+
+
+# ---------- Open Ledger ----------
+def _open_ledger() -> Ledger:
+    """
+    Return the ledger, importing a legacy blockchain.json once and
+    creating the genesis block if the ledger is empty.
+    """
+    ledger = get_ledger()
+    if len(ledger) == 0:
+        with ledger.lock():
+            ledger.refresh()
+            if len(ledger) == 0 and CHAIN_PATH.exists():
+                count = migrate_from_json(ledger, CHAIN_PATH, repair=repair_genesis)
+                logger.info("Migrated %d blocks from %s to %s", count, CHAIN_PATH, ledger.root)
+            if len(ledger) == 0:
+                ledger.append(_create_genesis_block())
+    return ledger
+
+
+_cache: Optional[ChainCache] = None
+_writer: Optional[BlockWriter] = None
+_init_lock = threading.Lock()
+
+
+def get_chain_cache() -> ChainCache:
+    """Return the process-wide chain cache shared by all ledger readers."""
+    global _cache
+    if _cache is None:
+        with _init_lock:
+            if _cache is None:
+                _cache = ChainCache(_open_ledger())
+    return _cache
 
-    return data
+
+def get_block_writer() -> BlockWriter:
+    """Return the process-wide writer that serializes all appends."""
+    global _writer
+    if _writer is None:
+        cache = get_chain_cache()
+        with _init_lock:
+            if _writer is None:
+                _writer = BlockWriter(_open_ledger(), cache, compute_block_hash)
+                _writer.add_listener(block_feed.publish)
+    return _writer
+
+
+def close_block_writer() -> None:
+    """Write whatever is queued and stop the writer thread, if one was started."""
+    if _writer is not None:
+        _writer.close()
+
+
+# ---------- Metrics ----------
+def _cache_stat(key: str):
+    return (_cache.stats()[key] if _cache is not None else 0)
+
+
+def _writer_stat(key: str):
+    return (_writer.stats()[key] if _writer is not None else 0)
+
+
+gauge("chain_blocks", "Blocks in the ledger", fn=lambda: chain_height())
+gauge("chain_bytes", "Size of the ledger segments on disk", fn=lambda: _open_ledger().disk_size())
+gauge("chain_cache_hits_total", "Chain cache reads served from memory", fn=lambda: _cache_stat("hits"), kind="counter")
+gauge("chain_cache_misses_total", "Chain cache reloads from the ledger", fn=lambda: _cache_stat("misses"), kind="counter")
+gauge("block_writer_batches_total", "Group commits written", fn=lambda: _writer_stat("batches"), kind="counter")
+gauge("block_writer_queued", "Blocks waiting for the writer", fn=lambda: _writer_stat("queued"))
+gauge("block_feed_subscribers", "Open block stream subscribers", fn=lambda: len(block_feed))
+
+
+# ---------- Load Blockchain ----------
+def load_chain() -> dict:
+    """Return the chain as {'chain': [...]}, served from the in-process cache."""
+    with stage_timer("load_chain"):
+        return {"chain": get_chain_cache().blocks()}
+
+
+# ---------- Range Reads ----------
+def iter_blocks(start: int = 0, stop: Optional[int] = None):
+    """
+    Yield blocks [start, stop) straight from the ledger segments, without
+    materializing the chain in memory.
+    """
+    ledger = _open_ledger()
+    ledger.refresh()
+    return ledger.iter_blocks(start, stop)
+
+
+def get_block(index: int) -> Optional[dict]:
+    """Return one block read from its indexed offset in the ledger, or None."""
+    ledger = _open_ledger()
+    ledger.refresh()
+    return ledger.get_block(index)
+
+
+def chain_height() -> int:
+    return _open_ledger().refresh()["height"]
+
+
+def blocks_since(index: Optional[int] = None, timestamp: Optional[datetime] = None) -> list:
+    """
+    Return blocks with an index above `index` and a timestamp after
+    `timestamp`. Block timestamps never decrease, so the timestamp bound is
+    found by bisection.
+    """
+    blocks = get_chain_cache().blocks(index + 1 if index is not None else 0)
+    if timestamp is not None:
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        start = bisect_right(blocks, timestamp, key=lambda b: datetime.fromisoformat(b["timestamp"]))
+        blocks = blocks[start:]
+    return blocks
+
+
+def watch_chain_tip() -> None:
+    """Publish blocks appended by other worker processes to block_feed (one thread per process)."""
+    block_feed.watch_tip(chain_height, iter_blocks)
+
+
+# ---------- Chain ETag ----------
+def chain_etag(*parts: str) -> str:
+    """
+    Strong ETag for a response derived from the chain: changes whenever a
+    block is appended (new tip hash) or the request parameters differ.
+    """
+    tip = _open_ledger().refresh()
+    key = "|".join([str(tip["index"]), tip["hash"] or "", *parts])
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+# ---------- Indexed Lookups ----------
+def find_alert_block(alert_uuid: str) -> Optional[dict]:
+    """Return the block that raised an alert, without scanning the chain."""
+    return get_chain_cache().find_alert(alert_uuid)
+
+
+def blocks_for_temp_id(temp_id: str) -> list:
+    """Return all blocks (issues and resolutions) recorded for a temp_id."""
+    return get_chain_cache().by_temp_id(temp_id)
+
+
+def blocks_of_type(block_type: str) -> list:
+    return get_chain_cache().by_type(block_type)
+
+
+def nearby_alerts(lat: float, lon: float, radius_km: float, limit: Optional[int] = None) -> list:
+    """Return (distance_km, issue block) of unresolved alerts within radius_km, nearest first."""
+    return get_chain_cache().nearby(lat, lon, radius_km, limit)
 
 
 # ---------- Add New Block ----------
@@ -64,26 +192,22 @@ def add_block(data: dict, block_type: str = "issue") -> dict:
     """
     Add a new block to the chain.
     block_type: 'issue', 'resolution', or 'other' (default 'issue')
+    Appends go through a single writer thread, so concurrent callers
+    never fork the chain and are committed to disk in batches.
     """
-    chain = load_chain()
-    last = chain["chain"][-1]
-    block_dict = {
-        "index": last["index"] + 1,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "type": block_type,        # added type field
-        "data": data,
-        "prev_hash": last["hash"]
-    }
-    block_dict["hash"] = compute_block_hash(block_dict)
+    with stage_timer("add_block"):
+        return get_block_writer().append(data, block_type)
 
-    chain["chain"].append(block_dict)
-    CHAIN_PATH.write_text(json.dumps(chain, indent=2))
-    return block_dict
+
+async def add_block_async(data: dict, block_type: str = "issue") -> dict:
+    """add_block for async routes: awaits the writer without holding a thread."""
+    with stage_timer("add_block"):
+        return await asyncio.wrap_future(get_block_writer().submit(data, block_type))
 
 
 # ---------- Example Usage ----------
 if __name__ == "__main__":
-    new_block = add_block({
+    block = add_block({
         "temp_id": "12e3ade1-07ed-4edb-bd3b-e7dee771470b",
         "alert_uuid": "cfbd06ce-df25-4300-bd37-135e84036e50",
         "lat": 0.0,
@@ -91,4 +215,4 @@ if __name__ == "__main__":
         "message": "1234"
     }, block_type="issue")  # default type is 'issue'
 
-    print("New block added:", new_block)
+    print("New block added:", block)
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from ledger import Ledger
+from block_hash import block_problem
+from blockchain import get_chain_cache
+
+# A Merkle anchor is recorded for every ANCHOR_INTERVAL verified blocks
+ANCHOR_INTERVAL = int(os.getenv("LEDGER_ANCHOR_INTERVAL", "1000"))
+
+# Process pool size for full audits; chains shorter than two anchors are
+# audited in-process since the pool start-up would dominate
+AUDIT_WORKERS = int(os.getenv("AUDIT_WORKERS", str(os.cpu_count() or 1)))
+
+
+class ChainInvalid(Exception):
+    """Raised with the offending block index when validation fails."""
+
+    def __init__(self, index: int, reason: str):
+        super().__init__(index, reason)
+        self.index = index
+        self.reason = reason
+
+    def __str__(self) -> str:
+        return f"Block {self.index} {self.reason}"
+
+
+# ---------- Merkle Root ----------
+def merkle_root(hashes: List[str]) -> str:
+    """Pairwise SHA256 Merkle root over hex block hashes (last node duplicated on odd levels)."""
+    level = [bytes.fromhex(h) for h in hashes]
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+    return level[0].hex()
+
+
+# ---------- Range Verification ----------
+def verify_blocks(blocks: Iterable[Dict], prev_hash: Optional[str] = None,
+                  check_data: bool = True) -> Tuple[int, Optional[str], Optional[str]]:
+    """
+    Re-hash a run of consecutive blocks and check their links. `prev_hash`
+    is the hash the first block must point at (None skips that check).
+    check_data=False checks format-2 blocks by their header hash only,
+    without re-digesting their data.
+    Returns (count, first prev_hash, last hash); raises ChainInvalid.
+    """
+    count = 0
+    first_prev = last_hash = None
+    for block in blocks:
+        problem = block_problem(block, check_data)
+        if problem:
+            raise ChainInvalid(block["index"], problem)
+        if count == 0:
+            first_prev = block["prev_hash"]
+        if prev_hash is not None and block["prev_hash"] != prev_hash:
+            raise ChainInvalid(block["index"], "prev_hash mismatch")
+        prev_hash = last_hash = block["hash"]
+        count += 1
+    return count, first_prev, last_hash
+
+
+def _audit_range(root: str, segment_blocks: int, start: int, stop: int,
+                 anchor: Optional[str], check_data: bool = True) -> Tuple[int, Optional[str], Optional[str]]:
+    """Process-pool worker: verify blocks [start, stop) straight from the segment files."""
+    ledger = Ledger(Path(root), segment_blocks, readonly=True)
+    hashes: List[str] = []
+
+    def blocks():
+        for block in ledger.iter_blocks(start, stop):
+            hashes.append(block["hash"])
+            yield block
+
+    result = verify_blocks(blocks(), check_data=check_data)
+    if anchor is not None and merkle_root(hashes) != anchor:
+        raise ChainInvalid(start, f"range {start}-{stop - 1} does not match its Merkle anchor")
+    return result
+
+
+# ---------- Checkpoints & Anchors ----------
+class ChainAuditor:
+    """
+    Validates the ledger incrementally. The last verified block is kept as
+    a checkpoint ({'index', 'hash'}) so routine checks only re-hash blocks
+    appended since; a Merkle root is anchored for every ANCHOR_INTERVAL
+    blocks so full audits can verify ranges in parallel worker processes.
+    """
+
+    def __init__(self, ledger: Ledger, anchor_interval: int = ANCHOR_INTERVAL,
+                 workers: int = AUDIT_WORKERS):
+        self.ledger = ledger
+        self.anchor_interval = anchor_interval
+        self.workers = workers
+        self._lock = threading.RLock()
+
+    @property
+    def checkpoint_path(self) -> Path:
+        return self.ledger.root / "checkpoint.json"
+
+    @property
+    def anchors_path(self) -> Path:
+        return self.ledger.root / "anchors.jsonl"
+
+    def checkpoint(self) -> Optional[Dict]:
+        try:
+            return json.loads(self.checkpoint_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_checkpoint(self, index: int, block_hash: str) -> Dict:
+        checkpoint = {"index": index, "hash": block_hash}
+        tmp = self.checkpoint_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(checkpoint))
+        os.replace(tmp, self.checkpoint_path)
+        return checkpoint
+
+    def anchors(self) -> Dict[int, Dict]:
+        """Return anchors keyed by their first block index."""
+        anchors: Dict[int, Dict] = {}
+        if self.anchors_path.exists():
+            with open(self.anchors_path) as f:
+                for line in f:
+                    if line.strip():
+                        anchor = json.loads(line)
+                        anchors[anchor["start"]] = anchor
+        return anchors
+
+    def _extend_anchors(self, verified_height: int) -> None:
+        anchors = self.anchors()
+        start = max(anchors) + self.anchor_interval if anchors else 0
+        new = []
+        while start + self.anchor_interval <= verified_height:
+            stop = start + self.anchor_interval
+            hashes = [b["hash"] for b in self.ledger.iter_blocks(start, stop)]
+            new.append({"start": start, "stop": stop, "root": merkle_root(hashes)})
+            start = stop
+        if new:
+            with open(self.anchors_path, "a") as f:
+                f.write("".join(json.dumps(a) + "\n" for a in new))
+
+    # ---------- Validation ----------
+    def validate(self) -> Dict:
+        """Verify only the blocks after the last checkpoint."""
+        with self._lock:
+            tip = self.ledger.refresh()
+            checkpoint = self.checkpoint()
+            if checkpoint is None or checkpoint["index"] >= tip["height"]:
+                return self.validate_full(workers=1)
+
+            start = checkpoint["index"]
+            blocks = self.ledger.iter_blocks(start, tip["height"])
+            anchor_block = next(blocks)
+            if anchor_block["hash"] != checkpoint["hash"]:
+                raise ChainInvalid(start, "does not match the verified checkpoint")
+            count, _, last_hash = verify_blocks(blocks, prev_hash=checkpoint["hash"])
+
+            if count:
+                checkpoint = self._write_checkpoint(start + count, last_hash)
+            self._extend_anchors(checkpoint["index"] + 1)
+            return {"valid": True, "mode": "incremental", "checked": count, "checkpoint": checkpoint}
+
+    def validate_full(self, workers: Optional[int] = None, check_data: bool = True) -> Dict:
+        """
+        Re-verify the whole chain from genesis, in parallel when it is long
+        enough. check_data=False skips re-digesting format-2 block data.
+        """
+        workers = self.workers if workers is None else workers
+        with self._lock:
+            tip = self.ledger.refresh()
+            height = tip["height"]
+            if height == 0:
+                return {"valid": True, "mode": "full", "checked": 0, "checkpoint": None}
+
+            if workers <= 1 or height < 2 * self.anchor_interval:
+                count, _, last_hash = verify_blocks(self.ledger.iter_blocks(0, height), check_data=check_data)
+            else:
+                count, last_hash = self._audit_parallel(height, workers, check_data)
+
+            checkpoint = self._write_checkpoint(height - 1, last_hash)
+            self._extend_anchors(height)
+            return {"valid": True, "mode": "full" if check_data else "headers", "checked": count,
+                    "checkpoint": checkpoint}
+
+    def _audit_parallel(self, height: int, workers: int, check_data: bool = True) -> Tuple[int, str]:
+        anchors = self.anchors()
+        ranges: List[Tuple[int, int, Optional[str]]] = []
+        start = 0
+        while start < height:
+            anchor = anchors.get(start)
+            if anchor is not None and anchor["stop"] <= height:
+                ranges.append((start, anchor["stop"], anchor["root"]))
+                start = anchor["stop"]
+            else:
+                stop = min(start + self.anchor_interval, height)
+                ranges.append((start, stop, None))
+                start = stop
+
+        root = str(self.ledger.root)
+        seg = self.ledger.segment_blocks
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_audit_range, root, seg, a, b, r, check_data) for a, b, r in ranges]
+            results = [f.result() for f in futures]
+
+        # Stitch ranges together: each must start where the previous one ended
+        count = 0
+        prev_hash = None
+        for (start, _, _), (n, first_prev, last_hash) in zip(ranges, results):
+            if prev_hash is not None and first_prev != prev_hash:
+                raise ChainInvalid(start, "prev_hash mismatch")
+            prev_hash = last_hash
+            count += n
+        return count, prev_hash
+
+
+
+_auditor: Optional[ChainAuditor] = None
+
+
+def get_auditor() -> ChainAuditor:
+    global _auditor
+    if _auditor is None:
+        _auditor = ChainAuditor(get_chain_cache().ledger)
+    return _auditor
@@ -0,0 +1,260 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from ledger import Ledger
+from ledger_index import LedgerIndex
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+# ---------- In-Process Chain Cache ----------
+class ChainCache:
+    """
+    Thread-safe in-memory copy of the ledger shared by all readers.
+
+    The cache is keyed on the stat signature of the ledger tip file, so
+    blocks appended by another process are picked up on the next read.
+    Only the new tail is parsed when the chain has grown; appends made
+    through add_block are pushed in directly and never cause a miss.
+    Secondary indexes (see LedgerIndex) are kept in step with the blocks.
+
+    A snapshot of the indexes (see save_snapshot) lets a restart parse only
+    the blocks written since the snapshot. The blocks below it (`base`) are
+    read once, outside the lock, by the first reader that needs them, and
+    stay in memory from then on.
+    """
+
+    def __init__(self, ledger: Ledger):
+        self._ledger = ledger
+        self._lock = threading.Lock()
+        self._base = 0
+        self._blocks: List[Dict] = []
+        self._last_hash: Optional[str] = None
+        self._index = LedgerIndex()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ledger(self) -> Ledger:
+        return self._ledger
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self._ledger.root / "snapshot.json"
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self._ledger.tip_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _extend(self, blocks: List[Dict]) -> None:
+        if blocks:
+            self._blocks.extend(blocks)
+            self._index.add_many(blocks)
+            self._last_hash = blocks[-1]["hash"]
+
+    def _reload(self) -> None:
+        tip = self._ledger.refresh()
+        height = tip["height"]
+        cached = self._base + len(self._blocks)
+
+        if 0 < cached <= height:
+            tail = list(self._ledger.iter_blocks(cached, height))
+            if not tail or tail[0]["prev_hash"] == self._last_hash:
+                self._extend(tail)
+                return
+
+        if self._restore_snapshot(height):
+            return
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._base = 0
+        self._blocks = []
+        self._index = LedgerIndex()
+        self._extend(self._ledger.read_all())
+
+    def _refresh(self) -> None:
+        """Bring the cache up to date with the ledger. Caller holds the lock."""
+        signature = self._stat()
+        if signature is not None and signature == self._signature:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._reload()
+            self._signature = signature
+
+    def refresh(self) -> int:
+        """Bring the cache up to date now (e.g. to warm it up); returns the chain height."""
+        with self._lock:
+            self._refresh()
+            return self._base + len(self._blocks)
+
+    def _load_base(self) -> None:
+        """
+        Read the blocks below `base` (left on disk by a snapshot restore)
+        without holding the lock, then splice them in front of the cached
+        blocks. Counted as a miss.
+        """
+        with self._lock:
+            base = self._base
+        if base == 0:
+            return
+        prefix = list(self._ledger.iter_blocks(0, base))
+        with self._lock:
+            if self._base != base:
+                return
+            self.misses += 1
+            head = self._blocks[0]["prev_hash"] if self._blocks else self._last_hash
+            if len(prefix) == base and prefix[-1]["hash"] == head:
+                self._blocks = prefix + self._blocks
+                self._base = 0
+            else:
+                logger.warning("Ledger changed below the chain snapshot, rebuilding the cache")
+                # Stat before reading: blocks appended meanwhile make the
+                # next read miss instead of being skipped
+                signature = self._stat()
+                self._ledger.refresh()
+                self._rebuild()
+                self._signature = signature
+
+    def _read(self, indexes: Callable[[], List[int]]) -> List[Dict]:
+        """
+        Blocks at the positions returned by `indexes()`, which runs under the
+        lock on the refreshed cache; loads the blocks below `base` first when
+        any position falls there.
+        """
+        while True:
+            with self._lock:
+                self._refresh()
+                found = indexes()
+                if not found or min(found) >= self._base:
+                    return [self._blocks[i - self._base] for i in found]
+            self._load_base()
+
+    def blocks(self, start: int = 0) -> List[Dict]:
+        """Return a snapshot list of blocks from `start` on. Callers must not mutate the blocks."""
+        while True:
+            with self._lock:
+                self._refresh()
+                if start >= self._base:
+                    return self._blocks[start - self._base:]
+            self._load_base()
+
+    # ---------- Indexed Lookups ----------
+    def find_alert(self, alert_uuid: str) -> Optional[Dict]:
+        """Return the block that raised `alert_uuid`, if any."""
+        def indexes():
+            index = self._index.alert(alert_uuid)
+            return [] if index is None else [index]
+        found = self._read(indexes)
+        return found[0] if found else None
+
+    def by_temp_id(self, temp_id: str) -> List[Dict]:
+        return self._read(lambda: self._index.temp_id(temp_id))
+
+    def by_type(self, block_type: str) -> List[Dict]:
+        return self._read(lambda: self._index.type(block_type))
+
+    def nearby(self, lat: float, lon: float, radius_km: float,
+               limit: Optional[int] = None) -> List[Tuple[float, Dict]]:
+        """(distance_km, issue block) of unresolved alerts within radius_km, nearest first."""
+        hits: List[Tuple[float, int]] = []
+
+        def indexes():
+            hits[:] = self._index.nearby(lat, lon, radius_km, limit)
+            return [i for _, i in hits]
+        return [(d, block) for (d, _), block in zip(hits, self._read(indexes))]
+
+    def tip_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Stat signature of the tip file; see on_append."""
+        return self._stat()
+
+    def on_append(self, blocks: List[Dict], signature: Optional[Tuple[int, int, int]]) -> None:
+        """
+        Record blocks just written by this process. `signature` must be the
+        tip_signature() taken under the ledger lock right after the append:
+        a stat taken later could already include another worker's blocks
+        that this cache does not hold.
+        """
+        with self._lock:
+            if self._signature is not None and self._base + len(self._blocks) == blocks[0]["index"]:
+                self._extend(blocks)
+                self._signature = signature
+            else:
+                self._signature = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._signature = None
+
+    # ---------- Snapshots ----------
+    def _restore_snapshot(self, height: int) -> bool:
+        """Load the index snapshot and parse only the blocks after it. Caller holds the lock."""
+        try:
+            snapshot = json.loads(self.snapshot_path.read_text())
+        except FileNotFoundError:
+            return False
+        except (OSError, json.JSONDecodeError):
+            logger.warning("Ignoring unreadable chain snapshot %s", self.snapshot_path)
+            return False
+
+        base = snapshot.get("height", 0)
+        if snapshot.get("version") != SNAPSHOT_VERSION or not 0 < base <= height:
+            return False
+        last = self._ledger.get_block(base - 1)
+        if last is None or last["hash"] != snapshot["hash"]:
+            logger.warning("Chain snapshot at height %d does not match the ledger, rebuilding", base)
+            return False
+
+        self._base = base
+        self._blocks = []
+        self._last_hash = snapshot["hash"]
+        self._index = LedgerIndex.from_dict(snapshot["index"])
+        self._extend(list(self._ledger.iter_blocks(base, height)))
+        return True
+
+    def snapshot_height(self) -> int:
+        """Height covered by the snapshot on disk, 0 if there is none."""
+        try:
+            return json.loads(self.snapshot_path.read_text()).get("height", 0)
+        except (OSError, json.JSONDecodeError):
+            return 0
+
+    def save_snapshot(self) -> int:
+        """
+        Write the indexes and tip to snapshot.json, so the next start only
+        parses the blocks after it. Returns the snapshot height.
+        """
+        with self._lock:
+            self._refresh()
+            height = self._base + len(self._blocks)
+            if height == 0:
+                return 0
+            snapshot = {"version": SNAPSHOT_VERSION, "height": height, "hash": self._last_hash,
+                        "index": self._index.to_dict()}
+            tmp = self.snapshot_path.with_name(f"snapshot.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(snapshot, separators=(",", ":")))
+            os.replace(tmp, self.snapshot_path)
+            return height
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "blocks": self._base + len(self._blocks),
+                "blocks_in_memory": len(self._blocks),
+                "snapshot_height": self._base,
+                "index": self._index.stats(),
+            }
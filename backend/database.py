@@ -1,24 +1,99 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from metrics import instrument_engine
 
 # ------------------------
-# Ensure data folder exists
+# Database URL
 # ------------------------
-os.makedirs("./data", exist_ok=True)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/app.db")
+
+# Async driver for each sync URL scheme (override with ASYNC_DATABASE_URL)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def _async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
 
 # ------------------------
-# Database URL
+# Engine profile
 # ------------------------
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/app.db")
+# PRAGMAs applied to every new SQLite connection. 'production' switches to
+# WAL so readers no longer block behind writers; 'default' keeps SQLite's
+# stock rollback journal.
+SQLITE_PROFILES = {
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        "cache_size": -int(os.getenv("SQLITE_CACHE_KB", "65536")),
+        "temp_store": "MEMORY",
+    },
+    "default": {},
+}
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+def _pool_options(url: str) -> dict:
+    if ":memory:" in url or url.rstrip("/").endswith("sqlite:"):
+        return {}
+    return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+
+
+def _apply_sqlite_profile(sync_engine, profile: str) -> None:
+    pragmas = SQLITE_PROFILES[profile]
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_db_engine(url: str = DATABASE_URL, profile: str = SQLITE_PROFILE):
+    """Sync engine with the pool and SQLite PRAGMAs of the given profile."""
+    is_sqlite = url.startswith("sqlite")
+    db_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+        **_pool_options(url)
+    )
+    if is_sqlite:
+        _apply_sqlite_profile(db_engine, profile)
+    instrument_engine(db_engine)
+    return db_engine
+
+
+def create_db_async_engine(url: str = ASYNC_DATABASE_URL, profile: str = SQLITE_PROFILE):
+    """Async engine with the same pool and PRAGMA settings as create_db_engine."""
+    db_engine = create_async_engine(url, **_pool_options(url))
+    if url.startswith("sqlite"):
+        _apply_sqlite_profile(db_engine.sync_engine, profile)
+    instrument_engine(db_engine.sync_engine)
+    return db_engine
 
 # ------------------------
 # Engine
 # ------------------------
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-)
+engine = create_db_engine()
+
+# Async engine used by the request hot path (panic, alerts, register, tourist)
+async_engine = create_db_async_engine()
 
 # ------------------------
 # Session
@@ -29,11 +104,61 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # ------------------------
 # Base class for models
 # ------------------------
 Base = declarative_base()
 
+# ------------------------
+# Schema migration
+# ------------------------
+def migrate_schema():
+    """
+    Add columns and indexes introduced after a table was first created;
+    create_all only creates missing tables.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {ddl}"))
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn)
+
+# ------------------------
+# Startup initialization
+# ------------------------
+def _ensure_sqlite_dir(url: str) -> None:
+    """Create the folder of a file-backed SQLite database."""
+    scheme, _, path = url.partition(":///")
+    if scheme.startswith("sqlite") and path and not path.startswith(":memory:"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+
+def init_db():
+    """
+    Create the database folder, missing tables, columns and indexes. Called
+    once from the app's startup rather than at import, so importing this
+    module never touches the filesystem.
+    """
+    import models  # noqa: F401  (registers the tables on Base.metadata)
+    _ensure_sqlite_dir(DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    migrate_schema()
+
 # ------------------------
 # Dependency for FastAPI
 # ------------------------
@@ -43,4 +168,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """Provide an async database session for async FastAPI routes."""
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
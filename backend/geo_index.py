@@ -0,0 +1,165 @@
+import math
+import os
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: distances fall back to a pure Python loop
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+# Grid cell edge in degrees (0.1 deg is ~11 km of latitude)
+GEO_CELL_DEG = float(os.getenv("GEO_CELL_DEG", "0.1"))
+
+
+# ---------- Distance ----------
+def haversine_km(lat: float, lon: float, lats: Sequence[float], lons: Sequence[float]) -> List[float]:
+    """Great-circle distances in km from (lat, lon) to each (lats[i], lons[i])."""
+    if np is not None:
+        lat1, lon1 = np.radians(lat), np.radians(lon)
+        lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+        lon2 = np.radians(np.asarray(lons, dtype=np.float64))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))).tolist()
+
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    cos_lat1 = math.cos(lat1)
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+    out = []
+    for la, lo in zip(lats, lons):
+        lat2 = radians(la)
+        a = sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * cos(lat2) * sin((radians(lo) - lon1) / 2) ** 2
+        out.append(2 * EARTH_RADIUS_KM * asin(sqrt(min(a, 1.0))))
+    return out
+
+
+def haversine_pairs_km(lats1: Sequence[float], lons1: Sequence[float],
+                       lats2: Sequence[float], lons2: Sequence[float]) -> List[float]:
+    """Element-wise great-circle distances in km between (lats1[i], lons1[i]) and (lats2[i], lons2[i])."""
+    if np is not None:
+        lat1 = np.radians(np.asarray(lats1, dtype=np.float64))
+        lon1 = np.radians(np.asarray(lons1, dtype=np.float64))
+        lat2 = np.radians(np.asarray(lats2, dtype=np.float64))
+        lon2 = np.radians(np.asarray(lons2, dtype=np.float64))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))).tolist()
+
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+    out = []
+    for la1, lo1, la2, lo2 in zip(lats1, lons1, lats2, lons2):
+        la1, la2 = radians(la1), radians(la2)
+        a = sin((la2 - la1) / 2) ** 2 + cos(la1) * cos(la2) * sin((radians(lo2) - radians(lo1)) / 2) ** 2
+        out.append(2 * EARTH_RADIUS_KM * asin(sqrt(min(a, 1.0))))
+    return out
+
+
+def valid_point(lat, lon) -> bool:
+    return (isinstance(lat, (int, float)) and isinstance(lon, (int, float))
+            and -90 <= lat <= 90 and -180 <= lon <= 180)
+
+
+# ---------- Grid Index ----------
+def cell_of(lat: float, lon: float, cell_deg: float = GEO_CELL_DEG) -> Tuple[int, int]:
+    """(row, col) of the grid cell containing a point; columns wrap at the antimeridian."""
+    return int((lat + 90) // cell_deg), int((lon + 180) // cell_deg) % math.ceil(360 / cell_deg)
+
+
+def cell_span(lat: float, lon: float, radius_km: float,
+              cell_deg: float = GEO_CELL_DEG) -> Tuple[Sequence[int], Sequence[int]]:
+    """Rows and columns of the cells overlapping the bounding box of a circle."""
+    lon_cells = math.ceil(360 / cell_deg)
+    dlat = radius_km / KM_PER_DEGREE
+    lat_lo, lat_hi = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    rows = range(int((lat_lo + 90) // cell_deg), int((lat_hi + 90) // cell_deg) + 1)
+
+    # Longitude degrees shrink towards the poles; widen the box accordingly
+    max_cos = math.cos(math.radians(max(abs(lat_lo), abs(lat_hi))))
+    dlon = 180.0 if max_cos < 1e-9 else radius_km / (KM_PER_DEGREE * max_cos)
+    if dlon >= 180:
+        return rows, range(lon_cells)
+    first = int((lon - dlon + 180) // cell_deg)
+    last = int((lon + dlon + 180) // cell_deg)
+    return rows, [c % lon_cells for c in range(first, min(last, first + lon_cells - 1) + 1)]
+
+
+
+class GeoGrid:
+    """
+    Points bucketed into fixed lat/lon cells. A radius query only visits the
+    cells overlapping the circle's bounding box, then ranks the candidates
+    by exact haversine distance.
+    """
+
+    def __init__(self, cell_deg: float = GEO_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, Tuple[float, float, object]]] = {}
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return cell_of(lat, lon, self.cell_deg)
+
+    def add(self, key: Hashable, lat: float, lon: float, value: object = None) -> None:
+        """Insert or move `key`; `value` is returned with the key by nearby()."""
+        self.remove(key)
+        cell = self._cell(lat, lon)
+        self._cells.setdefault(cell, {})[key] = (lat, lon, value)
+        self._where[key] = cell
+
+    def remove(self, key: Hashable) -> bool:
+        cell = self._where.pop(key, None)
+        if cell is None:
+            return False
+        bucket = self._cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self._cells[cell]
+        return True
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def items(self) -> Iterator[Tuple[Hashable, float, float, object]]:
+        """Yield (key, lat, lon, value) for every point."""
+        for bucket in self._cells.values():
+            for key, (lat, lon, value) in bucket.items():
+                yield key, lat, lon, value
+
+    def _candidate_cells(self, lat: float, lon: float, radius_km: float) -> Iterable[Tuple[int, int]]:
+        rows, cols = cell_span(lat, lon, radius_km, self.cell_deg)
+
+        # Large radius over a sparse grid: walking occupied cells is cheaper
+        if len(rows) * len(cols) > len(self._cells):
+            row_set, col_set = set(rows), set(cols)
+            return [cell for cell in self._cells if cell[0] in row_set and cell[1] in col_set]
+        return [(r, c) for r in rows for c in cols if (r, c) in self._cells]
+
+    def nearby(self, lat: float, lon: float, radius_km: float,
+               limit: Optional[int] = None) -> List[Tuple[float, Hashable, object]]:
+        """Return (distance_km, key, value) within radius_km, nearest first."""
+        keys, lats, lons, values = [], [], [], []
+        for cell in self._candidate_cells(lat, lon, radius_km):
+            for key, (la, lo, value) in self._cells[cell].items():
+                keys.append(key)
+                lats.append(la)
+                lons.append(lo)
+                values.append(value)
+        if not keys:
+            return []
+
+        distances = haversine_km(lat, lon, lats, lons)
+        hits = [(d, keys[i], values[i]) for i, d in enumerate(distances) if d <= radius_km]
+        hits.sort(key=lambda hit: hit[0])
+        return hits[:limit] if limit is not None else hits
+
+    def stats(self) -> Dict:
+        return {
+            "points": len(self._where),
+            "cells": len(self._cells),
+            "cell_deg": self.cell_deg,
+            "vectorized": np is not None,
+        }
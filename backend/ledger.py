@@ -0,0 +1,666 @@
+import gzip
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import msgpack
+except ImportError:  # only needed for LEDGER_ENCODING=msgpack
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # only needed for zstd-compressed archives
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+LEDGER_DIR = Path(os.getenv("LEDGER_DIR", "data/ledger"))
+LEGACY_CHAIN_PATH = Path("data/blockchain.json")
+
+# Blocks per segment file; block N always lives in segment N // SEGMENT_BLOCKS
+SEGMENT_BLOCKS = int(os.getenv("LEDGER_SEGMENT_BLOCKS", "10000"))
+
+# fsync policy: 'always' (every append), 'interval' (at most every
+# LEDGER_FSYNC_INTERVAL seconds) or 'never' (leave it to the OS)
+FSYNC_POLICY = os.getenv("LEDGER_FSYNC", "always")
+FSYNC_INTERVAL = float(os.getenv("LEDGER_FSYNC_INTERVAL", "1.0"))
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+# Record encoding of a new ledger: 'json' (JSON lines) or 'msgpack'. An
+# existing ledger keeps its encoding until `python ledger.py convert`.
+LEDGER_ENCODING = os.getenv("LEDGER_ENCODING", "json")
+
+# Compression of archived (cold) segments, see Ledger.archive()
+ARCHIVE_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# Decompressed cold segments kept in memory per ledger
+COLD_CACHE_SEGMENTS = int(os.getenv("LEDGER_COLD_CACHE_SEGMENTS", "2"))
+
+# Offset index entry (start of a record in its segment) and msgpack record length
+_OFFSET = struct.Struct("<Q")
+_LENGTH = struct.Struct("<I")
+
+
+# ---------- Record Encodings ----------
+class JsonCodec:
+    """One compact JSON object per line."""
+
+    name = "json"
+    suffix = ".jsonl"
+
+    def encode(self, block: Dict) -> bytes:
+        return json.dumps(block, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    def read(self, buf, offset: int) -> Tuple[Dict, int]:
+        """Decode the record at offset; returns (block, offset of the next record)."""
+        end = buf.find(b"\n", offset)
+        if end < 0:
+            raise ValueError(f"Truncated record at offset {offset}")
+        return json.loads(buf[offset:end]), end + 1
+
+    def scan(self, raw: bytes) -> Tuple[List[int], int]:
+        """Return the offsets of the complete records in raw and where the last one ends."""
+        offsets: List[int] = []
+        pos = 0
+        while True:
+            end = raw.find(b"\n", pos)
+            if end < 0:
+                return offsets, pos
+            offsets.append(pos)
+            pos = end + 1
+
+
+class MsgpackCodec:
+    """Length-prefixed msgpack records (little-endian u32 size, then the packed block)."""
+
+    name = "msgpack"
+    suffix = ".mpk"
+
+    def encode(self, block: Dict) -> bytes:
+        packed = msgpack.packb(block, use_bin_type=True)
+        return _LENGTH.pack(len(packed)) + packed
+
+    def read(self, buf, offset: int) -> Tuple[Dict, int]:
+        (size,) = _LENGTH.unpack_from(buf, offset)
+        start = offset + _LENGTH.size
+        if start + size > len(buf):
+            raise ValueError(f"Truncated record at offset {offset}")
+        return msgpack.unpackb(buf[start:start + size], raw=False), start + size
+
+    def scan(self, raw: bytes) -> Tuple[List[int], int]:
+        offsets: List[int] = []
+        pos = 0
+        while pos + _LENGTH.size <= len(raw):
+            (size,) = _LENGTH.unpack_from(raw, pos)
+            end = pos + _LENGTH.size + size
+            if end > len(raw):
+                break
+            offsets.append(pos)
+            pos = end
+        return offsets, pos
+
+
+CODECS = {"json": JsonCodec(), "msgpack": MsgpackCodec()}
+
+_SEGMENT_GLOB = "[0-9]" * 8
+
+
+def get_codec(encoding: str):
+    if encoding not in CODECS:
+        raise ValueError(f"Unknown ledger encoding '{encoding}', expected one of {tuple(CODECS)}")
+    if encoding == "msgpack" and msgpack is None:
+        raise RuntimeError("The msgpack ledger encoding needs the msgpack package (pip install msgpack)")
+    return CODECS[encoding]
+
+
+# ---------- Cold Segment Compression ----------
+def check_compression(compression: str) -> None:
+    if compression not in ARCHIVE_SUFFIXES:
+        raise ValueError(f"Unknown archive compression '{compression}', expected one of {tuple(ARCHIVE_SUFFIXES)}")
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError("zstd archives need the zstandard package (pip install zstandard)")
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(path: Path) -> bytes:
+    raw = path.read_bytes()
+    if path.suffix == ARCHIVE_SUFFIXES["zstd"]:
+        check_compression("zstd")
+        return zstandard.ZstdDecompressor().decompress(raw)
+    return gzip.decompress(raw)
+
+
+# ---------- Segmented Append-Only Ledger ----------
+class Ledger:
+    """
+    Append-only block log stored as segment files.
+
+    Layout:
+        <root>/tip.json              last index/hash, size of the open segment, encoding
+        <root>/00000000.jsonl        blocks 0 .. SEGMENT_BLOCKS-1 (.mpk when msgpack-encoded)
+        <root>/00000000.jsonl.idx    offset of every block in the segment (u64 each)
+        <root>/00000001.jsonl        ...
+        <root>/00000001.jsonl.gz     an archived segment (see archive())
+
+    Appending only touches the open segment, its index and the tip file, so
+    the cost of a new block no longer depends on the length of the chain.
+    Reads memory-map the segment and start at the indexed offset, so a
+    single block or a short range only touches the bytes it needs.
+    """
+
+    def __init__(self, root: Path = LEDGER_DIR, segment_blocks: int = SEGMENT_BLOCKS,
+                 fsync: str = FSYNC_POLICY, fsync_interval: float = FSYNC_INTERVAL,
+                 readonly: bool = False, encoding: str = LEDGER_ENCODING):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}', expected one of {FSYNC_POLICIES}")
+        self.root = Path(root)
+        self.segment_blocks = segment_blocks
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._last_fsync = 0.0
+        self._cold: "OrderedDict[int, bytes]" = OrderedDict()
+        self._cold_lock = threading.Lock()
+        if readonly:
+            # Readers in other processes trust the tip and never repair segments
+            self._tip = {"height": 0, "index": -1, "hash": None, "size": 0, "encoding": encoding}
+            self.refresh()
+            self.codec = get_codec(self._tip["encoding"])
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.codec = get_codec(self._detect_encoding(encoding))
+        self._tip = self._load_tip()
+
+    @property
+    def encoding(self) -> str:
+        return self.codec.name
+
+    def _detect_encoding(self, requested: str) -> str:
+        """Return the encoding of the blocks already on disk, or `requested` for an empty ledger."""
+        encoding = None
+        try:
+            tip = json.loads(self.tip_path.read_text())
+            if tip["height"] > 0:
+                encoding = tip.get("encoding", "json")
+        except (OSError, json.JSONDecodeError, KeyError):
+            pass
+        if encoding is None:
+            encoding = next((c.name for c in CODECS.values() if self._segment_files(c)), requested)
+        if encoding != requested:
+            logger.warning("Ledger %s is %s-encoded, ignoring LEDGER_ENCODING=%s "
+                           "(use 'python ledger.py convert %s')", self.root, encoding, requested, requested)
+        return encoding
+
+    # ---------- Paths ----------
+    @property
+    def tip_path(self) -> Path:
+        return self.root / "tip.json"
+
+    @property
+    def lock_path(self) -> Path:
+        return self.root / "ledger.lock"
+
+    def segment_path(self, segment: int) -> Path:
+        return self.root / f"{segment:08d}{self.codec.suffix}"
+
+    def index_path(self, segment: int) -> Path:
+        return self.root / f"{segment:08d}{self.codec.suffix}.idx"
+
+    def cold_path(self, segment: int, compression: str) -> Path:
+        return self.root / f"{segment:08d}{self.codec.suffix}{ARCHIVE_SUFFIXES[compression]}"
+
+    def segment_of(self, index: int) -> int:
+        return index // self.segment_blocks
+
+    def _segment_files(self, codec=None) -> List[Path]:
+        """Hot segment files of one encoding, in order (other files in the directory are ignored)."""
+        return sorted(self.root.glob(_SEGMENT_GLOB + (codec or self.codec).suffix))
+
+    def _cold_file(self, segment: int) -> Optional[Path]:
+        for compression in ARCHIVE_SUFFIXES:
+            path = self.cold_path(segment, compression)
+            if path.exists():
+                return path
+        return None
+
+    # ---------- Cross-Process Lock ----------
+    @contextmanager
+    def lock(self, name: str = "ledger"):
+        """
+        Hold an exclusive OS file lock on the ledger so that several worker
+        processes never append on top of the same tip. Other names give
+        independent locks for maintenance that must not block appends.
+        """
+        with open(self.root / f"{name}.lock", "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    # ---------- Tip ----------
+    def _load_tip(self) -> Dict:
+        """
+        Read the tip file, falling back to a scan of the last segment when
+        the tip is missing or disagrees with the segment on disk (e.g. after
+        a crash between the append and the tip update).
+        """
+        tip = None
+        if self.tip_path.exists():
+            try:
+                tip = json.loads(self.tip_path.read_text())
+            except json.JSONDecodeError:
+                tip = None
+
+        if tip is not None:
+            tip["encoding"] = self.encoding
+            if tip["height"] == 0:
+                return tip
+            segment = self.segment_of(tip["index"])
+            seg_path = self.segment_path(segment)
+            if (seg_path.exists() and seg_path.stat().st_size == tip["size"]
+                    and not self.segment_path(segment + 1).exists()):
+                return tip
+
+        return self._recover_tip()
+
+    def _recover_tip(self) -> Dict:
+        segments = self._segment_files()
+        if not segments:
+            tip = {"height": 0, "index": -1, "hash": None, "size": 0, "encoding": self.encoding}
+            self._write_tip(tip)
+            return tip
+
+        last_path = segments[-1]
+        raw = last_path.read_bytes()
+        # Drop a trailing partial record left behind by an interrupted write
+        offsets, end = self.codec.scan(raw)
+        if end != len(raw):
+            with open(last_path, "r+b") as f:
+                f.truncate(end)
+            raw = raw[:end]
+
+        if not offsets:
+            last_path.unlink()
+            Path(f"{last_path}.idx").unlink(missing_ok=True)
+            return self._recover_tip()
+
+        last, _ = self.codec.read(raw, offsets[-1])
+        self._write_index(self.segment_of(last["index"]), 0, offsets)
+        tip = {"height": last["index"] + 1, "index": last["index"], "hash": last["hash"], "size": end,
+               "encoding": self.encoding}
+        self._write_tip(tip)
+        return tip
+
+    def _write_tip(self, tip: Dict) -> None:
+        tmp = self.tip_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(tip))
+        os.replace(tmp, self.tip_path)
+
+    def refresh(self) -> Dict:
+        """
+        Re-read the tip written by another process. The tip file is only
+        replaced after its blocks are on disk, so it is trusted as-is here.
+        """
+        try:
+            tip = json.loads(self.tip_path.read_text())
+            tip.setdefault("encoding", "json")
+            self._tip = tip
+        except (OSError, json.JSONDecodeError):
+            pass
+        return self.tip()
+
+    def tip(self) -> Dict:
+        """Return {'height', 'index', 'hash', 'size', 'encoding'} for the last block."""
+        return dict(self._tip)
+
+    def __len__(self) -> int:
+        return self._tip["height"]
+
+    # ---------- Append ----------
+    def _maybe_fsync(self, fd: int) -> None:
+        if self.fsync == "always":
+            os.fsync(fd)
+        elif self.fsync == "interval":
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                os.fsync(fd)
+                self._last_fsync = now
+
+    def append(self, block: Dict) -> None:
+        self.append_many([block])
+
+    def append_many(self, blocks: List[Dict]) -> None:
+        """
+        Append already-hashed blocks. Each block's index must follow the
+        current tip; blocks crossing a segment boundary roll over to a new file.
+        """
+        if not blocks:
+            return
+
+        tip = self._tip
+        expected = tip["height"]
+        encode = self.codec.encode
+        by_segment: Dict[int, List[bytes]] = {}
+        for block in blocks:
+            if block["index"] != expected:
+                raise ValueError(f"Block index {block['index']} does not follow tip {expected - 1}")
+            by_segment.setdefault(self.segment_of(expected), []).append(encode(block))
+            expected += 1
+
+        size = tip["size"]
+        local = tip["height"] - self.segment_of(tip["height"]) * self.segment_blocks
+        for segment, records in by_segment.items():
+            with open(self.segment_path(segment), "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(b"".join(records))
+                f.flush()
+                self._maybe_fsync(f.fileno())
+                size = f.tell()
+            offsets = []
+            for record in records:
+                offsets.append(offset)
+                offset += len(record)
+            self._append_index(segment, local, offsets)
+            local = 0
+
+        last = blocks[-1]
+        self._tip = {"height": expected, "index": last["index"], "hash": last["hash"], "size": size,
+                     "encoding": self.encoding}
+        self._write_tip(self._tip)
+
+    # ---------- Offset Index ----------
+    # The index is derived from its segment: it is not fsynced, and an
+    # index that is short or does not line up is rebuilt on the next read.
+    def _write_index(self, segment: int, first: int, offsets: List[int]) -> None:
+        """Write offsets for the segment's blocks first.. and drop any entries after them."""
+        path = self.index_path(segment)
+        with open(path, "r+b" if path.exists() else "wb") as f:
+            f.seek(first * _OFFSET.size)
+            f.write(b"".join(_OFFSET.pack(o) for o in offsets))
+            f.truncate()
+
+    def _append_index(self, segment: int, first: int, offsets: List[int]) -> None:
+        try:
+            entries = self.index_path(segment).stat().st_size // _OFFSET.size
+        except FileNotFoundError:
+            entries = 0
+        if entries < first:
+            self._rebuild_index(segment)
+        else:
+            self._write_index(segment, first, offsets)
+
+    def _rebuild_index(self, segment: int) -> None:
+        with self._segment_buffer(segment) as buf:
+            offsets, _ = self.codec.scan(buf)
+        self._write_index(segment, 0, offsets)
+
+    def _offset(self, segment: int, local: int) -> Optional[int]:
+        try:
+            with open(self.index_path(segment), "rb") as f:
+                f.seek(local * _OFFSET.size)
+                entry = f.read(_OFFSET.size)
+        except FileNotFoundError:
+            return None
+        return _OFFSET.unpack(entry)[0] if len(entry) == _OFFSET.size else None
+
+    # ---------- Read ----------
+    def _cold_bytes(self, segment: int) -> bytes:
+        with self._cold_lock:
+            data = self._cold.get(segment)
+            if data is not None:
+                self._cold.move_to_end(segment)
+                return data
+        path = self._cold_file(segment)
+        if path is None:
+            raise FileNotFoundError(self.segment_path(segment))
+        data = _decompress(path)
+        with self._cold_lock:
+            self._cold[segment] = data
+            while len(self._cold) > COLD_CACHE_SEGMENTS:
+                self._cold.popitem(last=False)
+        return data
+
+    @contextmanager
+    def _segment_buffer(self, segment: int):
+        """The segment's bytes: memory-mapped while hot, decompressed once archived."""
+        try:
+            f = open(self.segment_path(segment), "rb")
+        except FileNotFoundError:
+            f = None
+        if f is None:
+            yield self._cold_bytes(segment)
+            return
+        with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield buf
+
+    def _read_range(self, segment: int, start: int, stop: int) -> List[Dict]:
+        """Decode blocks [start, stop) of one segment, starting at the indexed offset."""
+        for attempt in range(2):
+            offset = self._offset(segment, start - segment * self.segment_blocks)
+            if offset is not None:
+                blocks = []
+                with self._segment_buffer(segment) as buf:
+                    try:
+                        for _ in range(stop - start):
+                            block, offset = self.codec.read(buf, offset)
+                            blocks.append(block)
+                    except (ValueError, struct.error):
+                        blocks = []
+                if blocks and blocks[0]["index"] == start and blocks[-1]["index"] == stop - 1:
+                    return blocks
+            if attempt == 0:
+                self._rebuild_index(segment)
+        raise ValueError(f"Segment {segment} does not hold blocks {start}-{stop - 1}")
+
+    def iter_blocks(self, start: int = 0, stop: Optional[int] = None,
+                    chunk: int = 1000) -> Iterator[Dict]:
+        """Yield blocks with start <= index < stop, decoding `chunk` blocks per segment read."""
+        height = self._tip["height"]
+        stop = height if stop is None else min(stop, height)
+        start = max(start, 0)
+        while start < stop:
+            segment = self.segment_of(start)
+            end = min(stop, (segment + 1) * self.segment_blocks, start + chunk)
+            yield from self._read_range(segment, start, end)
+            start = end
+
+    def disk_size(self) -> int:
+        """Bytes used by the segment files, hot or archived."""
+        height = self._tip["height"]
+        if height == 0:
+            return 0
+        total = 0
+        for segment in range(self.segment_of(height - 1) + 1):
+            try:
+                total += self.segment_path(segment).stat().st_size
+            except FileNotFoundError:
+                cold = self._cold_file(segment)
+                total += cold.stat().st_size if cold is not None else 0
+        return total
+
+    def read_all(self) -> List[Dict]:
+        return list(self.iter_blocks(chunk=self.segment_blocks))
+
+    def get_block(self, index: int) -> Optional[Dict]:
+        if not 0 <= index < self._tip["height"]:
+            return None
+        return self._read_range(self.segment_of(index), index, index + 1)[0]
+
+    # ---------- Export ----------
+    def export_json(self, path: Path) -> None:
+        """Write the whole ledger in the legacy {'chain': [...]} format for auditors."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w") as f:
+            f.write('{"chain": [')
+            for i, block in enumerate(self.iter_blocks()):
+                f.write(",\n" if i else "\n")
+                f.write(json.dumps(block))
+            f.write("\n]}\n")
+        os.replace(tmp, path)
+
+    # ---------- Cold Archive ----------
+    def archive(self, before: int, compression: str = "gzip", keep: int = 0) -> List[int]:
+        """
+        Compress full segments whose blocks all lie below `before` into cold
+        files, leaving the newest `keep` of them hot. The segment holding
+        the tip is never archived. Archived segments stay readable (they
+        are decompressed on demand) and keep their offset index.
+        Returns the archived segment numbers.
+        """
+        check_compression(compression)
+        limit = min(before, self._tip["height"] - 1) // self.segment_blocks - keep
+        archived = []
+        for segment in range(max(limit, 0)):
+            hot = self.segment_path(segment)
+            if not hot.exists():
+                continue
+            cold = self.cold_path(segment, compression)
+            tmp = cold.with_name(cold.name + ".tmp")
+            with open(tmp, "wb") as f:
+                f.write(_compress(hot.read_bytes(), compression))
+                f.flush()
+                os.fsync(f.fileno())
+            # The cold file is in place before the hot one goes, so readers always find one
+            os.replace(tmp, cold)
+            hot.unlink()
+            archived.append(segment)
+        return archived
+
+    def cold_segments(self) -> List[int]:
+        return sorted(int(p.name[:8]) for suffix in ARCHIVE_SUFFIXES.values()
+                      for p in self.root.glob(_SEGMENT_GLOB + self.codec.suffix + suffix))
+
+    # ---------- Re-encoding ----------
+    def convert(self, encoding: str) -> int:
+        """
+        Rewrite every segment in another encoding. The new segments are
+        built in a staging directory and take over when the tip is replaced,
+        so an interrupted conversion leaves the old ledger readable. Archived
+        segments come back hot. Run it with the app stopped.
+        Returns the number of blocks converted.
+        """
+        codec = get_codec(encoding)
+        if codec is self.codec:
+            return 0
+        with self.lock():
+            self.refresh()
+            staging = self.root / "convert.tmp"
+            if staging.exists():
+                for leftover in staging.iterdir():
+                    leftover.unlink()
+            target = Ledger(staging, self.segment_blocks, fsync=self.fsync, encoding=encoding)
+            for segment in range(self.segment_of(len(self) - 1) + 1 if len(self) else 0):
+                first = segment * self.segment_blocks
+                target.append_many(self._read_range(segment, first, min(first + self.segment_blocks, len(self))))
+
+            old_files = list(self.root.glob(_SEGMENT_GLOB + self.codec.suffix + "*"))
+            for path in target._segment_files():
+                os.replace(path, self.root / path.name)
+                os.replace(f"{path}.idx", self.root / f"{path.name}.idx")
+            self.codec = codec
+            self._cold.clear()
+            self._tip = target.tip()
+            self._write_tip(self._tip)
+            for path in old_files:
+                path.unlink(missing_ok=True)
+            for leftover in staging.iterdir():
+                leftover.unlink()
+            staging.rmdir()
+            return len(self)
+
+
+# ---------- One-shot Migration ----------
+def migrate_from_json(ledger: Ledger, json_path: Path = LEGACY_CHAIN_PATH,
+                      repair: Optional[Callable[[List[Dict]], List[Dict]]] = None) -> int:
+    """
+    Import a legacy blockchain.json into an empty ledger. `repair` may fix up
+    the block list before it is written. The source file is renamed to
+    '<name>.migrated' afterwards so the import only runs once.
+    Returns the number of blocks imported.
+    """
+    json_path = Path(json_path)
+    if len(ledger) > 0:
+        raise RuntimeError("Ledger already contains blocks, refusing to migrate")
+    if not json_path.exists():
+        return 0
+
+    try:
+        content = json_path.read_text()
+        data = json.loads(content) if content.strip() else None
+    except json.JSONDecodeError:
+        data = None
+
+    chain = data.get("chain", []) if isinstance(data, dict) else []
+    if chain:
+        if repair is not None:
+            chain = repair(chain)
+        ledger.append_many(chain)
+
+    json_path.rename(json_path.with_suffix(json_path.suffix + ".migrated"))
+    return len(chain)
+
+
+_ledger: Optional[Ledger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Ledger:
+    """Return the process-wide ledger instance."""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = Ledger()
+    return _ledger
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    usage = "usage: python ledger.py migrate [blockchain.json] | export <out.json> | convert <json|msgpack>"
+    if len(sys.argv) < 2:
+        sys.exit(usage)
+
+    if sys.argv[1] == "migrate":
+        from blockchain import repair_genesis
+        src = Path(sys.argv[2]) if len(sys.argv) > 2 else LEGACY_CHAIN_PATH
+        print(f"Imported {migrate_from_json(Ledger(), src, repair=repair_genesis)} blocks from {src}")
+    elif sys.argv[1] == "export" and len(sys.argv) > 2:
+        Ledger().export_json(Path(sys.argv[2]))
+        print(f"Exported ledger to {sys.argv[2]}")
+    elif sys.argv[1] == "convert" and len(sys.argv) > 2:
+        ledger = Ledger()
+        print(f"Converted {ledger.convert(sys.argv[2])} blocks to {ledger.encoding}")
+    else:
+        sys.exit(usage)
@@ -0,0 +1,102 @@
+import logging
+import os
+import sys
+import threading
+from typing import Dict, Optional
+from ledger import check_compression
+from blockchain import get_chain_cache
+from chain_audit import ChainInvalid, get_auditor
+from metrics import ERRORS, gauge, stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background compaction passes; 0 disables the thread
+COMPACT_INTERVAL = float(os.getenv("LEDGER_COMPACT_INTERVAL", "300"))
+
+# A new snapshot is written once this many blocks were appended since the last one
+SNAPSHOT_BLOCKS = int(os.getenv("LEDGER_SNAPSHOT_BLOCKS", "10000"))
+
+# Compression for archived segments: 'off', 'gzip' or 'zstd' (needs zstandard)
+ARCHIVE_COMPRESSION = os.getenv("LEDGER_ARCHIVE", "off")
+
+# Verified full segments left uncompressed behind the open one
+ARCHIVE_KEEP = int(os.getenv("LEDGER_ARCHIVE_KEEP", "2"))
+
+
+# ---------- Compaction ----------
+def compact(snapshot_blocks: int = SNAPSHOT_BLOCKS, compression: str = ARCHIVE_COMPRESSION,
+            keep: int = ARCHIVE_KEEP) -> Dict:
+    """
+    One compaction pass: snapshot the chain indexes once `snapshot_blocks`
+    blocks were appended since the last snapshot, then compress full
+    segments the auditor has verified. Returns
+    {'snapshot': height or None, 'archived': [segment, ...]}.
+    """
+    if compression != "off":
+        check_compression(compression)
+    cache = get_chain_cache()
+    ledger = cache.ledger
+    result: Dict = {"snapshot": None, "archived": []}
+
+    # A separate lock: appends carry on while segments are compressed
+    with ledger.lock("compact"):
+        height = ledger.refresh()["height"]
+        if height - cache.snapshot_height() >= max(snapshot_blocks, 1):
+            with stage_timer("chain_snapshot"):
+                result["snapshot"] = cache.save_snapshot()
+
+        if compression == "off":
+            return result
+        try:
+            checkpoint = get_auditor().validate()["checkpoint"]
+        except ChainInvalid as e:
+            logger.error("Not archiving segments of an invalid chain: %s", e)
+            ERRORS.inc(where="ledger_compaction")
+            return result
+        if checkpoint is not None:
+            with stage_timer("segment_archive"):
+                result["archived"] = ledger.archive(checkpoint["index"] + 1, compression, keep)
+    if result["archived"]:
+        logger.info("Archived ledger segments %s (%s)", result["archived"], compression)
+    return result
+
+
+# ---------- Background Thread ----------
+_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def _run(interval: float) -> None:
+    while not _stop.wait(interval):
+        try:
+            compact()
+        except Exception:
+            logger.exception("Ledger compaction failed")
+            ERRORS.inc(where="ledger_compaction")
+
+
+def start_compaction(interval: float = COMPACT_INTERVAL) -> None:
+    """Run compact() every `interval` seconds in a daemon thread; no-op when interval is 0."""
+    global _thread
+    if interval <= 0 or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, args=(interval,), name="ledger-compactor", daemon=True)
+    _thread.start()
+
+
+def stop_compaction() -> None:
+    _stop.set()
+    if _thread is not None:
+        _thread.join()
+
+
+gauge("chain_archived_segments", "Ledger segments stored compressed",
+      fn=lambda: len(get_chain_cache().ledger.cold_segments()))
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    # python ledger_compaction.py [gzip|zstd]: snapshot now and archive verified segments
+    compression = sys.argv[1] if len(sys.argv) > 1 else ARCHIVE_COMPRESSION
+    print(compact(snapshot_blocks=1, compression=compression))
@@ -0,0 +1,86 @@
+from typing import Dict, List, Optional, Tuple
+from geo_index import GeoGrid, valid_point
+
+
+# ---------- Secondary Indexes ----------
+class LedgerIndex:
+    """
+    In-memory secondary indexes over the ledger, maintained block by block:
+
+        alert_uuid -> index of the block that raised the alert
+        temp_id    -> indexes of all blocks for that temp_id
+        type       -> indexes of all blocks of that type
+        open_alerts -> grid of unresolved issue locations (alert_uuid -> index)
+    """
+
+    def __init__(self):
+        self.by_alert: Dict[str, int] = {}
+        self.by_temp_id: Dict[str, List[int]] = {}
+        self.by_type: Dict[str, List[int]] = {}
+        self.open_alerts = GeoGrid()
+
+    def add(self, block: Dict) -> None:
+        index = block["index"]
+        self.by_type.setdefault(block.get("type", "other"), []).append(index)
+
+        data = block.get("data")
+        if not isinstance(data, dict):
+            return
+
+        alert_uuid = data.get("alert_uuid")
+        if alert_uuid and alert_uuid not in self.by_alert:
+            self.by_alert[alert_uuid] = index
+            if block.get("type") == "issue" and valid_point(data.get("lat"), data.get("lon")):
+                self.open_alerts.add(alert_uuid, data["lat"], data["lon"], index)
+        elif alert_uuid and block.get("type") == "resolution":
+            self.open_alerts.remove(alert_uuid)
+
+        temp_id = data.get("temp_id")
+        if temp_id:
+            self.by_temp_id.setdefault(temp_id, []).append(index)
+
+    def add_many(self, blocks: List[Dict]) -> None:
+        for block in blocks:
+            self.add(block)
+
+    def alert(self, alert_uuid: str) -> Optional[int]:
+        return self.by_alert.get(alert_uuid)
+
+    def temp_id(self, temp_id: str) -> List[int]:
+        return list(self.by_temp_id.get(temp_id, ()))
+
+    def type(self, block_type: str) -> List[int]:
+        return list(self.by_type.get(block_type, ()))
+
+    def nearby(self, lat: float, lon: float, radius_km: float,
+               limit: Optional[int] = None) -> List[Tuple[float, int]]:
+        """(distance_km, block index) of open alerts within radius_km, nearest first."""
+        return [(d, index) for d, _, index in self.open_alerts.nearby(lat, lon, radius_km, limit)]
+
+    # ---------- Snapshot ----------
+    def to_dict(self) -> Dict:
+        """JSON-serializable state, restored with LedgerIndex.from_dict()."""
+        return {
+            "by_alert": self.by_alert,
+            "by_temp_id": self.by_temp_id,
+            "by_type": self.by_type,
+            "open_alerts": [[key, lat, lon, index] for key, lat, lon, index in self.open_alerts.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "LedgerIndex":
+        index = cls()
+        index.by_alert = state["by_alert"]
+        index.by_temp_id = state["by_temp_id"]
+        index.by_type = state["by_type"]
+        for key, lat, lon, block_index in state["open_alerts"]:
+            index.open_alerts.add(key, lat, lon, block_index)
+        return index
+
+    def stats(self) -> Dict:
+        return {
+            "alerts": len(self.by_alert),
+            "open_alerts": self.open_alerts.stats(),
+            "temp_ids": len(self.by_temp_id),
+            "types": {t: len(ix) for t, ix in self.by_type.items()},
+        }
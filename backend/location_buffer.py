@@ -0,0 +1,376 @@
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+import logging
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, or_, select, update
+
+from database import SessionLocal
+from metrics import ERRORS, gauge, stage_timer
+from models import Tourist
+
+logger = logging.getLogger(__name__)
+
+LOCATION_HISTORY_DIR = Path(os.getenv("LOCATION_HISTORY_DIR", "data/locations"))
+
+# Seconds between flushes of buffered pings
+LOCATION_FLUSH_INTERVAL = float(os.getenv("LOCATION_FLUSH_INTERVAL", "1.0"))
+
+# Buffered pings that trigger a flush before the interval is up
+LOCATION_MAX_PENDING = int(os.getenv("LOCATION_MAX_PENDING", "50000"))
+
+# Days of history partitions kept; 0 keeps everything
+LOCATION_HISTORY_DAYS = int(os.getenv("LOCATION_HISTORY_DAYS", "30"))
+
+# Files each hour of history is split into by tourist; fixed per history
+# directory once the first ping is written (see layout.json)
+LOCATION_HISTORY_BUCKETS = int(os.getenv("LOCATION_HISTORY_BUCKETS", "64"))
+
+# Bound parameters per IN (...) query when checking tourist IDs
+_ID_CHUNK = 5000
+
+Ping = Tuple[str, float, float, Optional[float], datetime]  # tourist_id, lat, lon, accuracy, timestamp
+
+
+# ---------- Time-Partitioned History ----------
+# data/locations/<YYYY-MM-DD>/<HH>/<bucket>.csv, append-only files per UTC
+# hour, each holding the tourists whose ID hashes to that bucket:
+#     timestamp,tourist_id,lat,lon,accuracy
+# Reading one tourist's history opens one bucket per hour instead of every
+# ping of the hour. Each flush writes a partition's rows with a single
+# append, so readers and other workers never see a partial batch. Old days
+# are dropped whole. Hours written before the buckets (<HH>.csv) are still
+# read.
+
+def history_bucket(tourist_id: str, buckets: int) -> int:
+    return zlib.crc32(tourist_id.encode("utf-8")) % buckets
+
+
+def partition_path(root: Path, ts: datetime, tourist_id: str, buckets: int) -> Path:
+    return root / ts.strftime("%Y-%m-%d") / f"{ts:%H}" / f"{history_bucket(tourist_id, buckets):03d}.csv"
+
+
+def _legacy_partition_path(root: Path, ts: datetime) -> Path:
+    return root / ts.strftime("%Y-%m-%d") / f"{ts:%H}.csv"
+
+
+def _history_line(ping: Ping) -> str:
+    tourist_id, lat, lon, accuracy, ts = ping
+    return f"{ts.isoformat()},{tourist_id},{lat:.6f},{lon:.6f},{'' if accuracy is None else accuracy}\n"
+
+
+# ---------- Coalescing Location Buffer ----------
+class LocationBuffer:
+    """
+    Collects location pings in memory and writes them in bulk from a
+    background thread. Per tourist only the newest ping is kept for the
+    Tourist row (one UPDATE per tourist per flush, however often they
+    pinged); every ping is appended to the history partitions.
+    """
+
+    def __init__(self, history_dir: Path = LOCATION_HISTORY_DIR, interval: float = LOCATION_FLUSH_INTERVAL,
+                 max_pending: int = LOCATION_MAX_PENDING, history_days: int = LOCATION_HISTORY_DAYS,
+                 history_buckets: int = LOCATION_HISTORY_BUCKETS):
+        self.history_dir = Path(history_dir)
+        self.interval = interval
+        self.max_pending = max_pending
+        self.history_days = history_days
+        self.history_buckets = history_buckets
+        self._buckets: Optional[int] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._latest: Dict[str, Ping] = {}
+        self._pending: List[Ping] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_prune = 0.0
+        self.received = 0
+        self.flushes = 0
+        self.positions_written = 0
+        self.history_written = 0
+        self.unknown_dropped = 0
+        self.requeued = 0
+        self.last_flush_ms = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="location-flusher", daemon=True)
+                self._thread.start()
+
+    # ---------- Ingest ----------
+    def add_many(self, pings: Iterable[Ping]) -> int:
+        """Buffer pings; returns how many were accepted."""
+        self._ensure_started()
+        count = 0
+        with self._lock:
+            latest = self._latest
+            for ping in pings:
+                current = latest.get(ping[0])
+                if current is None or ping[4] >= current[4]:
+                    latest[ping[0]] = ping
+                self._pending.append(ping)
+                count += 1
+            self.received += count
+            if len(self._pending) >= self.max_pending:
+                self._wake.set()
+        return count
+
+    def add(self, tourist_id: str, lat: float, lon: float, accuracy: Optional[float] = None,
+            timestamp: Optional[datetime] = None) -> None:
+        self.add_many([(tourist_id, lat, lon, accuracy, timestamp or datetime.now(timezone.utc))])
+
+    def pending_position(self, tourist_id: str) -> Optional[Ping]:
+        """The newest ping of a tourist that has not been flushed yet."""
+        with self._lock:
+            return self._latest.get(tourist_id)
+
+    # ---------- Flush ----------
+    def flush(self) -> int:
+        """
+        Write buffered pings now; returns the number of pings flushed. On a
+        failure the pings not yet written go back into the buffer for the
+        next flush, and the error is raised.
+        """
+        with self._flush_lock:
+            with self._lock:
+                latest, self._latest = self._latest, {}
+                pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+
+            started = time.perf_counter()
+            with stage_timer("location_flush"):
+                try:
+                    known = self._write_positions(latest)
+                except Exception:
+                    self._requeue(latest, pending)
+                    raise
+                if len(known) < len(latest):
+                    pending = [p for p in pending if p[0] in known]
+                    self.unknown_dropped += sum(1 for t in latest if t not in known)
+                partitions = self._partition(pending)
+                try:
+                    self._write_history(partitions)
+                except Exception:
+                    # Positions are written; partitions still listed were not
+                    self._requeue({}, [p for pings in partitions.values() for p in pings])
+                    raise
+
+            self.flushes += 1
+            self.positions_written += len(known)
+            self.history_written += len(pending)
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            return len(pending)
+
+    def _requeue(self, latest: Dict[str, Ping], pending: List[Ping]) -> None:
+        """Put back pings a failed flush did not write, behind nothing newer."""
+        with self._lock:
+            for tourist_id, ping in latest.items():
+                current = self._latest.get(tourist_id)
+                if current is None or ping[4] > current[4]:
+                    self._latest[tourist_id] = ping
+            self._pending[:0] = pending
+        self.requeued += len(pending)
+
+    def _write_positions(self, latest: Dict[str, Ping]) -> Set[str]:
+        """
+        Bulk-update Tourist lat/lon/radius; returns the IDs that exist.
+        A row already holding a newer ping (e.g. before a late offline
+        upload) is left alone.
+        """
+        ids = list(latest)
+        table = Tourist.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .where(or_(table.c.location_at.is_(None), table.c.location_at <= bindparam("b_at")))
+            .values(lat=bindparam("b_lat"), lon=bindparam("b_lon"), radius=bindparam("b_radius"),
+                    location_at=bindparam("b_at"))
+        )
+        with SessionLocal() as db:
+            known: Set[str] = set()
+            for i in range(0, len(ids), _ID_CHUNK):
+                known.update(db.scalars(select(Tourist.id).where(Tourist.id.in_(ids[i:i + _ID_CHUNK]))))
+            if known:
+                db.execute(stmt, [
+                    {"b_id": t, "b_lat": p[1], "b_lon": p[2], "b_radius": p[3], "b_at": p[4]}
+                    for t, p in latest.items() if t in known
+                ])
+                db.commit()
+        return known
+
+    def _layout_buckets(self) -> int:
+        """
+        Bucket count of the history directory, recorded in layout.json by the
+        first writer; a different history_buckets is ignored so existing hours
+        stay readable.
+        """
+        if self._buckets is not None:
+            return self._buckets
+        path = self.history_dir / "layout.json"
+        try:
+            buckets = json.loads(path.read_text())["buckets"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            buckets = None
+        if buckets is None:
+            buckets = self.history_buckets
+            self.history_dir.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=self.history_dir, suffix=".tmp", delete=False) as f:
+                json.dump({"buckets": buckets}, f)
+            os.replace(f.name, path)
+        elif buckets != self.history_buckets:
+            logger.warning("Location history %s uses %d buckets, ignoring LOCATION_HISTORY_BUCKETS=%d",
+                           self.history_dir, buckets, self.history_buckets)
+        self._buckets = buckets
+        return buckets
+
+    def _partition(self, pings: List[Ping]) -> Dict[Path, List[Ping]]:
+        if not pings:
+            return {}
+        buckets = self._layout_buckets()
+        bucket_of: Dict[str, int] = {}
+        groups: Dict[Tuple[str, int], List[Ping]] = {}
+        for ping in pings:
+            bucket = bucket_of.get(ping[0])
+            if bucket is None:
+                bucket = bucket_of[ping[0]] = history_bucket(ping[0], buckets)
+            hour = ping[4].astimezone(timezone.utc).strftime("%Y-%m-%d/%H")
+            groups.setdefault((hour, bucket), []).append(ping)
+        return {self.history_dir / hour / f"{bucket:03d}.csv": group for (hour, bucket), group in groups.items()}
+
+    def _write_history(self, partitions: Dict[Path, List[Ping]]) -> None:
+        """Append each partition's pings, removing it from `partitions` once written."""
+        for path in list(partitions):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("".join(_history_line(p) for p in partitions[path]))
+            del partitions[path]
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """Delete history days older than history_days; returns the number of days removed."""
+        if self.history_days <= 0 or not self.history_dir.exists():
+            return 0
+        cutoff = ((now or datetime.now(timezone.utc)) - timedelta(days=self.history_days)).strftime("%Y-%m-%d")
+        removed = 0
+        for day in self.history_dir.iterdir():
+            if day.is_dir() and day.name < cutoff:
+                shutil.rmtree(day, ignore_errors=True)
+                removed += 1
+        return removed
+
+    # ---------- Flusher Thread ----------
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() - self._last_prune > 3600:
+                    self._last_prune = time.monotonic()
+                    self.prune()
+            except Exception:
+                logger.exception("Location flush failed")
+                ERRORS.inc(where="location_flush")
+                # The pings are back in the buffer; wait before retrying
+                # even if a full buffer keeps waking the thread
+                self._stop.wait(self.interval)
+
+    def close(self, attempts: int = 3) -> None:
+        """Stop the flusher thread and write whatever is still buffered, retrying failed flushes."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        for attempt in range(1, attempts + 1):
+            try:
+                self.flush()
+                return
+            except Exception:
+                logger.exception("Final location flush failed (attempt %d of %d)", attempt, attempts)
+                ERRORS.inc(where="location_flush")
+                if attempt < attempts:
+                    time.sleep(self.interval)
+        logger.error("Dropping %d buffered location pings", self.stats()["pending"])
+
+    # ---------- History Queries ----------
+    def history(self, tourist_id: str, since: datetime, until: datetime, limit: int = 10000) -> List[Dict]:
+        """
+        Pings of one tourist in [since, until], oldest first. Only the
+        tourist's bucket of each hour overlapping the range is read.
+        """
+        since = since.astimezone(timezone.utc)
+        until = until.astimezone(timezone.utc)
+        buckets = self._layout_buckets()
+        rows: List[Dict] = []
+        hour = since.replace(minute=0, second=0, microsecond=0)
+        while hour <= until and len(rows) < limit:
+            for path in (partition_path(self.history_dir, hour, tourist_id, buckets),
+                         _legacy_partition_path(self.history_dir, hour)):
+                if not path.exists():
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        ts, tid, lat, lon, accuracy = line.rstrip("\n").split(",")
+                        if tid != tourist_id:
+                            continue
+                        when = datetime.fromisoformat(ts)
+                        if since <= when <= until:
+                            rows.append({"timestamp": ts, "lat": float(lat), "lon": float(lon),
+                                         "accuracy": float(accuracy) if accuracy else None})
+            hour += timedelta(hours=1)
+        rows.sort(key=lambda r: r["timestamp"])
+        return rows[:limit]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pending = len(self._pending)
+            tourists = len(self._latest)
+        return {
+            "pending": pending,
+            "pending_tourists": tourists,
+            "received": self.received,
+            "flushes": self.flushes,
+            "positions_written": self.positions_written,
+            "history_written": self.history_written,
+            "unknown_dropped": self.unknown_dropped,
+            "requeued": self.requeued,
+            "last_flush_ms": self.last_flush_ms,
+            "interval": self.interval,
+        }
+
+
+_buffer: Optional[LocationBuffer] = None
+_buffer_lock = threading.Lock()
+
+gauge("location_pings_pending", "Location pings waiting for the next flush",
+      fn=lambda: _buffer.stats()["pending"] if _buffer is not None else 0)
+
+
+def get_location_buffer() -> LocationBuffer:
+    """Return the process-wide location buffer; pending pings are flushed at exit."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = LocationBuffer()
+                atexit.register(_buffer.close)
+    return _buffer
+
+
+def close_location_buffer() -> None:
+    """Flush and stop the location buffer, if one was created (again at exit is a no-op)."""
+    if _buffer is not None:
+        _buffer.close()
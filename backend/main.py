@@ -1,14 +1,62 @@
+# Imported first: startup time is measured from here
+from startup import STARTUP, start_warmup
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from database import Base, engine
-from routers import register, panic, alerts , blockchain_op, tourist_profile
+from fastapi.responses import FileResponse, JSONResponse, Response
+from database import engine, async_engine, init_db, SessionLocal
+from block_feed import block_feed
+from blockchain import close_block_writer
+from location_buffer import close_location_buffer
+from qr_cache import close_qr_cache
+from alert_view import sync_alert_view, watch_alert_view
+from passport_key import backfill_passport_keys
+from ledger_compaction import start_compaction, stop_compaction
+from metrics import REGISTRY, MetricsMiddleware
+from routers import register, panic, alerts , blockchain_op, tourist_profile, blobs, zones, locations
 import os
 
-# Ensure tables exist
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    STARTUP.starting()
+
+    # Ensure the data folder and tables exist
+    with STARTUP.phase("init_db"):
+        init_db()
+
+    # Materialize alerts written since the alert view was last updated (it
+    # is then kept in step by the block writer) and key tourists registered
+    # before passport_key existed
+    with STARTUP.phase("sync_alert_view"), SessionLocal() as db:
+        sync_alert_view(db)
+    watch_alert_view()
+    with STARTUP.phase("backfill_passport_keys"), SessionLocal() as db:
+        backfill_passport_keys(db)
+
+    # Periodic chain snapshots and cold-segment archiving (LEDGER_COMPACT_INTERVAL)
+    start_compaction()
+
+    # Chain cache, DB pools and QR renderer (STARTUP_WARMUP); /ready flips when done
+    warmup = await start_warmup()
+    yield
+
+    if warmup is not None:
+        warmup.cancel()
+    stop_compaction()
+    block_feed.close()
+    # Queued blocks and pings still need the database; the QR pool does not
+    close_block_writer()
+    close_location_buffer()
+    close_qr_cache()
+    await async_engine.dispose()
+    engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Request count/latency per route; exposed with the stage timers on /metrics
+app.add_middleware(MetricsMiddleware)
 
 # Include routers (API endpoints)
 app.include_router(register.router, prefix="/register", tags=["Tourists"])
@@ -16,7 +64,19 @@ app.include_router(tourist_profile.router, prefix="/tourist", tags=["Tourists"])
 app.include_router(panic.router, prefix="/panic", tags=["Tourists"])
 app.include_router(alerts.router, prefix="/alerts", tags=["Tourists"])
 app.include_router(blockchain_op.router, prefix="/blockchain", tags=["Tourists"])
-# app.include_router(zones.router, prefix="/zones", tags=["Zones"])
+app.include_router(blobs.router, prefix="/blobs", tags=["Tourists"])
+app.include_router(zones.router, prefix="/zones", tags=["Zones"])
+app.include_router(locations.router, prefix="/locations", tags=["Tourists"])
+
+# Prometheus text format; values are per worker process
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Readiness probe: 503 until startup and warm-up have finished, with the time each phase took
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    return JSONResponse(STARTUP.status(), status_code=200 if STARTUP.ready else 503)
 
 # --- NEW: Serve Frontend ---
 # Figure out path to /frontend folder (assuming it sits next to /backend)
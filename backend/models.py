@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Boolean, Float, Enum
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Boolean, Float, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -14,6 +14,15 @@ class ManagerStatus(enum.Enum):
     manager = "manager"
     staff = "staff"
 
+# ==========================
+# Enum for Geofence Zone Kinds
+# ==========================
+
+class ZoneKind(enum.Enum):
+    restricted = "restricted"
+    danger = "danger"
+    safe = "safe"
+
 # ==========================
 # Tourist Model
 # ==========================
@@ -24,7 +33,8 @@ class Tourist(Base):
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
     name = Column(String, nullable=False)
     passport = Column(String, unique=True, nullable=False)
-    temp_id = Column(String, nullable=False)
+    passport_key = Column(String, unique=True, index=True, nullable=True)  # see passport_key.normalize_passport
+    temp_id = Column(String, nullable=False, index=True)
     email = Column(String, unique=True, nullable=True)
     password = Column(String, nullable=True)
 
@@ -38,6 +48,7 @@ class Tourist(Base):
     lat = Column(Float, nullable=True)
     lon = Column(Float, nullable=True)
     radius = Column(Float, nullable=True)
+    location_at = Column(DateTime(timezone=True), nullable=True)  # time of the ping behind lat/lon
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -53,7 +64,7 @@ class History(Base):
     __tablename__ = "history"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
-    tourist_id = Column(String, nullable=False)
+    tourist_id = Column(String, nullable=False, index=True)
     temp_id = Column(String, nullable=False)
     itinerary = Column(String, nullable=True)
     start_time = Column(DateTime(timezone=True), nullable=False)
@@ -69,11 +80,32 @@ class AlertStatus(Base):
     __tablename__ = "alert_status"
 
     alert_uuid = Column(String, primary_key=True)
-    resolved = Column(Boolean, default=False, nullable=False)
+    resolved = Column(Boolean, default=False, nullable=False, index=True)
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     resolved_by = Column(String, nullable=True)
     last_block_hash = Column(String, nullable=True)
 
+    # Materialized copy of the issue block, kept by alert_view.py
+    temp_id = Column(String, nullable=True, index=True)
+    lat = Column(Float, nullable=True)
+    lon = Column(Float, nullable=True)
+    message = Column(String, nullable=True)
+    timestamp = Column(String, nullable=True, index=True)  # block timestamp (ISO 8601)
+    block_index = Column(Integer, nullable=True)
+    block_hash = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_alert_status_open", "resolved", "block_index"),
+    )
+
+
+class ViewState(Base):
+    """Last block index applied to a materialized view of the chain."""
+    __tablename__ = "view_state"
+
+    name = Column(String, primary_key=True)
+    high_water = Column(Integer, nullable=False)
+
 
 # ==========================
 # Reports Model
@@ -83,10 +115,11 @@ class Report(Base):
     __tablename__ = "reports"
 
     id = Column(Integer, primary_key=True, index=True)
-    tourist_id = Column(String, ForeignKey("tourists.id"), nullable=False)
+    tourist_id = Column(String, ForeignKey("tourists.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    image = Column(Text, nullable=True)
+    image = Column(Text, nullable=True)  # legacy inline base64, see image_digest
+    image_digest = Column(String, nullable=True)  # SHA256 key in the blob store
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -109,3 +142,26 @@ class ManagementUser(Base):
     active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# ==========================
+# Geofence Zones Model
+# ==========================
+
+class Zone(Base):
+    __tablename__ = "zones"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    name = Column(String, nullable=False)
+    kind = Column(Enum(ZoneKind), nullable=False, default=ZoneKind.restricted)
+
+    # Circle zones: centre + radius. Polygon zones: centroid + radius of the
+    # bounding circle (used as the index prefilter) and the vertices.
+    lat = Column(Float, nullable=False)
+    lon = Column(Float, nullable=False)
+    radius = Column(Float, nullable=False)  # meters
+    polygon = Column(Text, nullable=True)  # JSON [[lat, lon], ...]
+
+    active = Column(Boolean, default=True, nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
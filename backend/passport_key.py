@@ -0,0 +1,99 @@
+import logging
+import re
+import sys
+from typing import List, Optional
+from sqlalchemy import literal_column, select, update
+from sqlalchemy.orm import Session
+from models import Tourist
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+logger = logging.getLogger(__name__)
+
+
+# ---------- Normalized Passport Key ----------
+# Tourist.passport keeps what the tourist typed; passport_key is the
+# canonical form (upper case, no whitespace) with a unique index, so login
+# and duplicate checks are indexed lookups instead of a scan over
+# upper(trim(passport)).
+
+def normalize_passport(passport: Optional[str]) -> str:
+    return _WHITESPACE_RE.sub("", passport or "").upper()
+
+
+def _registration_order(db: Session) -> list:
+    """
+    ORDER BY for tourists in the order they were registered. created_at has
+    one-second resolution and ids are random UUIDs, so on SQLite the rowid
+    decides, which is also the row the login before passport_key matched.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return [literal_column("tourists.rowid")]
+    return [Tourist.created_at, Tourist.id]
+
+
+def backfill_passport_keys(db: Session, batch_size: int = 5000) -> int:
+    """
+    Compute passport_key for rows registered before the column existed.
+    Of tourists whose passports only differ in case or spacing, the first
+    registered gets the key; the others are left NULL and reported.
+    Returns the number of rows updated.
+    """
+    taken = set(db.scalars(select(Tourist.passport_key).where(Tourist.passport_key.is_not(None))))
+    rows = db.execute(
+        select(Tourist.id, Tourist.passport)
+        .where(Tourist.passport_key.is_(None))
+        .order_by(*_registration_order(db))
+    ).all()
+
+    updates, skipped = [], []
+    for tourist_id, passport in rows:
+        key = normalize_passport(passport)
+        if not key or key in taken:
+            skipped.append(tourist_id)
+            continue
+        taken.add(key)
+        updates.append({"id": tourist_id, "passport_key": key})
+
+    for i in range(0, len(updates), batch_size):
+        db.execute(update(Tourist), updates[i:i + batch_size])
+    db.commit()
+
+    if skipped:
+        logger.warning("passport_key: %d tourist(s) share a normalized passport and were not keyed: %s",
+                       len(skipped), skipped[:10])
+        misassigned = check_passport_keys(db)
+        if misassigned:
+            logger.error("passport_key: held by a later registration than the first with that passport: %s",
+                         misassigned[:10])
+    return len(updates)
+
+
+def check_passport_keys(db: Session) -> List[str]:
+    """
+    IDs of tourists holding a passport_key although an account with the
+    same normalized passport was registered before them (that account can
+    no longer log in). Empty when every key is with the first registration.
+    """
+    first: dict = {}
+    holders: dict = {}
+    for tourist_id, passport, key in db.execute(
+        select(Tourist.id, Tourist.passport, Tourist.passport_key).order_by(*_registration_order(db))
+    ):
+        first.setdefault(normalize_passport(passport), tourist_id)
+        if key is not None:
+            holders[key] = tourist_id
+    return [tourist_id for key, tourist_id in holders.items() if first.get(key, tourist_id) != tourist_id]
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    # python passport_key.py check: list keys not held by the first registration
+    from database import SessionLocal
+
+    if sys.argv[1:] != ["check"]:
+        sys.exit("usage: python passport_key.py check")
+    with SessionLocal() as db:
+        misassigned = check_passport_keys(db)
+    print("\n".join(misassigned) or "ok")
+    sys.exit(1 if misassigned else 0)
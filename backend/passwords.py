@@ -0,0 +1,128 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import re
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from metrics import stage_timer
+
+# KDF for new hashes: 'scrypt' or 'pbkdf2'
+PASSWORD_KDF = os.getenv("PASSWORD_KDF", "scrypt")
+
+SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "600000"))
+
+# Hashing runs in a bounded pool so a login burst cannot starve the event
+# loop. hashlib releases the GIL while deriving keys, so threads scale
+# across cores; 'process' is available for interpreters where it does not.
+PASSWORD_POOL = os.getenv("PASSWORD_POOL", "thread")
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(os.cpu_count() or 1)))
+
+KDFS = ("scrypt", "pbkdf2")
+SALT_BYTES = 16
+
+_LEGACY_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+# ---------- Encoding ----------
+# scrypt$<n>$<r>$<p>$<salt>$<hash>
+# pbkdf2_sha256$<iterations>$<salt>$<hash>
+# Legacy rows hold an unsalted SHA-256 hex digest.
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def _scrypt(password: bytes, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=256 * r * (n + p), dklen=32)
+
+
+def _pbkdf2(password: bytes, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password, salt, iterations)
+
+
+def is_legacy_hash(stored: str) -> bool:
+    return bool(_LEGACY_RE.match(stored or ""))
+
+
+# ---------- Hash / Verify ----------
+def hash_password(password: str, kdf: str = PASSWORD_KDF, n: int = SCRYPT_N, r: int = SCRYPT_R,
+                  p: int = SCRYPT_P, iterations: int = PBKDF2_ITERATIONS) -> str:
+    """Hash a password with a fresh salt using the configured KDF and cost."""
+    salt = os.urandom(SALT_BYTES)
+    secret = password.encode("utf-8")
+    if kdf == "scrypt":
+        return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(_scrypt(secret, salt, n, r, p))}"
+    if kdf == "pbkdf2":
+        return f"pbkdf2_sha256${iterations}${_b64(salt)}${_b64(_pbkdf2(secret, salt, iterations))}"
+    raise ValueError(f"Unknown password KDF '{kdf}', expected one of {KDFS}")
+
+
+def verify_password(password: str, stored: Optional[str]) -> bool:
+    """Check a password against any supported stored hash, including legacy SHA-256."""
+    if not stored:
+        return False
+    secret = password.encode("utf-8")
+    if is_legacy_hash(stored):
+        return hmac.compare_digest(hashlib.sha256(secret).hexdigest(), stored)
+
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            derived = _scrypt(secret, _unb64(parts[4]), n, r, p)
+            return hmac.compare_digest(derived, _unb64(parts[5]))
+        if parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            derived = _pbkdf2(secret, _unb64(parts[2]), int(parts[1]))
+            return hmac.compare_digest(derived, _unb64(parts[3]))
+    except ValueError:
+        return False
+    return False
+
+
+def needs_rehash(stored: Optional[str]) -> bool:
+    """True when a stored hash is legacy or uses a different KDF/cost than configured."""
+    if not stored or is_legacy_hash(stored):
+        return True
+    parts = stored.split("$")
+    if PASSWORD_KDF == "scrypt":
+        return parts[:4] != ["scrypt", str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+    return parts[:2] != ["pbkdf2_sha256", str(PBKDF2_ITERATIONS)]
+
+
+# ---------- Off-Loop Execution ----------
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> Executor:
+    """Return the process-wide bounded pool used for password hashing."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                if PASSWORD_POOL == "process":
+                    _executor = ProcessPoolExecutor(max_workers=PASSWORD_WORKERS)
+                else:
+                    _executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS,
+                                                   thread_name_prefix="password")
+    return _executor
+
+
+async def hash_password_async(password: str) -> str:
+    with stage_timer("password_hash"):
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), hash_password, password)
+
+
+async def verify_password_async(password: str, stored: Optional[str]) -> bool:
+    with stage_timer("password_verify"):
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), verify_password, password, stored)
@@ -0,0 +1,183 @@
+import asyncio
+import base64
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+from metrics import gauge, stage_timer
+
+QR_DIR = Path(os.getenv("QR_DIR", "data/qr"))
+
+# PNGs kept in memory; the on-disk copy survives restarts and evictions
+QR_CACHE_SIZE = int(os.getenv("QR_CACHE_SIZE", "1024"))
+
+# 0 renders in the request threadpool; >0 renders in a process pool of that size
+QR_WORKERS = int(os.getenv("QR_WORKERS", "0"))
+
+_ID_RE = re.compile(r"^[0-9A-Za-z-]{1,64}$")
+
+
+def is_tourist_id(value: str) -> bool:
+    return bool(_ID_RE.match(value or ""))
+
+
+# ---------- Rendering ----------
+def render_qr_png(tourist_id: str) -> bytes:
+    """Render the QR code for a tourist ID as PNG bytes."""
+    # Deferred: qrcode pulls in PIL, which most requests and workers never need
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=4)
+    qr.add_data(tourist_id)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white").get_image()
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def warm_renderer() -> None:
+    """Import qrcode/PIL and render once, so the first real QR code is not slowed down by it."""
+    render_qr_png("warm-up")
+
+
+# ---------- QR Cache ----------
+class QRCache:
+    """
+    QR PNGs keyed by tourist_id. A QR only encodes the permanent tourist ID,
+    so an entry never changes once rendered: lookups go memory (LRU), then
+    disk, then render.
+    """
+
+    def __init__(self, root: Path = QR_DIR, size: int = QR_CACHE_SIZE, workers: int = QR_WORKERS):
+        self.root = Path(root)
+        self.size = size
+        self.workers = workers
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.renders = 0
+
+    def path(self, tourist_id: str) -> Path:
+        if not is_tourist_id(tourist_id):
+            raise ValueError(f"Invalid tourist ID '{tourist_id}'")
+        return self.root / f"{tourist_id}.png"
+
+    def _remember(self, tourist_id: str, png: bytes) -> None:
+        with self._lock:
+            self._entries[tourist_id] = png
+            self._entries.move_to_end(tourist_id)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def _store(self, tourist_id: str, png: bytes) -> None:
+        path = self.path(tourist_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(png)
+        os.replace(tmp, path)
+        self._remember(tourist_id, png)
+
+    def cached(self, tourist_id: str) -> Optional[bytes]:
+        """Return the PNG from memory or disk without rendering."""
+        with self._lock:
+            png = self._entries.get(tourist_id)
+            if png is not None:
+                self._entries.move_to_end(tourist_id)
+                self.hits += 1
+                return png
+
+        path = self.path(tourist_id)
+        if path.exists():
+            png = path.read_bytes()
+            self.disk_hits += 1
+            self._remember(tourist_id, png)
+            return png
+        return None
+
+    def get_png(self, tourist_id: str) -> bytes:
+        png = self.cached(tourist_id)
+        if png is None:
+            with stage_timer("generate_qr_code"):
+                png = render_qr_png(tourist_id)
+            self.renders += 1
+            self._store(tourist_id, png)
+        return png
+
+    async def get_png_async(self, tourist_id: str) -> bytes:
+        """Like get_png, but renders off the event loop (process pool if QR_WORKERS > 0)."""
+        png = self.cached(tourist_id)
+        if png is not None:
+            return png
+
+        loop = asyncio.get_running_loop()
+        if self.workers > 0:
+            with stage_timer("generate_qr_code"):
+                png = await loop.run_in_executor(self._get_pool(), render_qr_png, tourist_id)
+            self.renders += 1
+            await loop.run_in_executor(None, self._store, tourist_id, png)
+            return png
+        return await loop.run_in_executor(None, self.get_png, tourist_id)
+
+    async def get_base64_async(self, tourist_id: str) -> str:
+        return base64.b64encode(await self.get_png_async(tourist_id)).decode()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            "entries": entries,
+            "size": self.size,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "renders": self.renders,
+            "workers": self.workers,
+        }
+
+
+_qr_cache: Optional[QRCache] = None
+_qr_cache_lock = threading.Lock()
+
+
+def _qr_lookups() -> dict:
+    if _qr_cache is None:
+        return {}
+    return {("memory",): _qr_cache.hits, ("disk",): _qr_cache.disk_hits, ("render",): _qr_cache.renders}
+
+
+gauge("qr_lookups_total", "QR code lookups by where the PNG came from", ("source",), fn=_qr_lookups, kind="counter")
+
+
+def get_qr_cache() -> QRCache:
+    """Return the process-wide QR cache."""
+    global _qr_cache
+    if _qr_cache is None:
+        with _qr_cache_lock:
+            if _qr_cache is None:
+                _qr_cache = QRCache()
+    return _qr_cache
+
+
+def close_qr_cache() -> None:
+    """Shut down the QR render pool, if the cache was used."""
+    if _qr_cache is not None:
+        _qr_cache.close()
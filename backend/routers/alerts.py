@@ -1,58 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from database import get_db
+import asyncio
+import hashlib
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models import AlertStatus
-from blockchain import load_chain, add_block
+from blockchain import (
+    add_block_async, find_alert_block, blocks_for_temp_id, blocks_since, iter_blocks, chain_height, chain_etag,
+    nearby_alerts, watch_chain_tip
+)
+from block_feed import block_feed
+from metrics import stage_timer
+from alert_view import open_alerts_query, open_alerts_state_query, view_row
 from datetime import datetime, timezone
 from typing import List, Optional, Dict
 
 router = APIRouter()
 
+# Seconds of silence before an SSE keep-alive comment
+STREAM_KEEPALIVE = 15.0
 
-def _merge_alert_status(chain_alerts: List[Dict], db: Session) -> List[Dict]:
+
+def _alert_row(block: Dict, status: Optional[AlertStatus] = None) -> Dict:
+    """
+    Build the alert representation of a block, preferring the DB
+    resolution status when one is given.
+    """
+    data = block["data"]
+    return {
+        "alert_uuid": data.get("alert_uuid"),
+        "temp_id": data.get("temp_id"),
+        "lat": data.get("lat"),
+        "lon": data.get("lon"),
+        "timestamp": block.get("timestamp"),
+        "blockchain_index": block.get("index"),
+        "blockchain_hash": block.get("hash"),
+        "resolved": status.resolved if status else data.get("resolved", False),
+        "resolved_at": status.resolved_at if status else data.get("resolved_at"),
+        "resolved_by": status.resolved_by if status else data.get("resolved_by"),
+        "message": data.get("message"),
+        "type": block.get("type")  # include block type
+    }
+
+
+async def _merge_alert_status(chain_alerts: List[Dict], db: AsyncSession, scoped: bool = False) -> List[Dict]:
     """
     Merge blockchain alerts with DB resolution status.
+    With scoped=True only the status rows of the given blocks are fetched.
     """
-    all_status = {s.alert_uuid: s for s in db.query(AlertStatus).all()}
-    merged: List[Dict] = []
+    with stage_timer("merge_alert_status"):
+        query = select(AlertStatus)
+        if scoped:
+            uuids = {b["data"].get("alert_uuid") for b in chain_alerts if isinstance(b.get("data"), dict)}
+            query = query.where(AlertStatus.alert_uuid.in_(uuids))
+        all_status = {s.alert_uuid: s for s in (await db.scalars(query))}
+        merged: List[Dict] = []
 
-    for block in chain_alerts:
-        data = block.get("data")
-        if data is None or data == "genesis":
-            continue
+        for block in chain_alerts:
+            data = block.get("data")
+            if data is None or data == "genesis":
+                continue
 
-        alert_uuid = data.get("alert_uuid")
-        status: Optional[AlertStatus] = all_status.get(alert_uuid)
+            status: Optional[AlertStatus] = all_status.get(data.get("alert_uuid"))
+            merged.append(_alert_row(block, status))
 
-        merged.append({
-            "alert_uuid": alert_uuid,
-            "temp_id": data.get("temp_id"),
-            "lat": data.get("lat"),
-            "lon": data.get("lon"),
-            "timestamp": block.get("timestamp"),
-            "blockchain_index": block.get("index"),
-            "blockchain_hash": block.get("hash"),
-            "resolved": status.resolved if status else data.get("resolved", False),
-            "resolved_at": status.resolved_at if status else data.get("resolved_at"),
-            "resolved_by": status.resolved_by if status else data.get("resolved_by"),
-            "message": data.get("message"),
-            "type": block.get("type")  # include block type
-        })
-
-    return merged
+        return merged
+
+
+async def _cache_headers(request: Request, response: Response, etag: Optional[str] = None) -> Optional[Response]:
+    """
+    Set the ETag on the response (the chain ETag unless `etag` is given);
+    return a 304 response instead when the client's If-None-Match already
+    matches.
+    """
+    if etag is None:
+        etag = await run_in_threadpool(chain_etag, request.url.path, request.url.query)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+async def _view_etag(request: Request, db: AsyncSession, temp_id: Optional[str] = None) -> str:
+    """
+    ETag of a response served from the alert view, keyed on the view's own
+    state: the view can change without the chain tip moving (resolve_alert,
+    a reconciled row) and the tip can move before the view has caught up.
+    """
+    count, high, total = (await db.execute(open_alerts_state_query(temp_id))).one()
+    key = "|".join(["view", str(count), str(high), str(total), request.url.path, request.url.query])
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+async def _open_alerts(db: AsyncSession, temp_id: Optional[str] = None) -> List[Dict]:
+    return [view_row(s) for s in await db.scalars(open_alerts_query(temp_id))]
 
 
 @router.get("/", summary="Get all alerts")
-def get_all_alerts(
+async def get_all_alerts(
+    request: Request,
+    response: Response,
     unresolved_only: bool = Query(False, description="Return only unresolved alerts"),
     include_resolution: bool = Query(False, description="Include resolution blocks in results"),
-    db: Session = Depends(get_db)
+    since_index: Optional[int] = Query(None, ge=0, description="Only blocks after this index"),
+    since_timestamp: Optional[datetime] = Query(None, description="Only blocks after this time (ISO 8601)"),
+    db: AsyncSession = Depends(get_async_db)
 ) -> List[Dict]:
     """
     Fetch all alerts from blockchain, optionally filtering unresolved ones and resolution blocks.
+    Pollers can fetch only new blocks with since_index / since_timestamp and
+    revalidate with If-None-Match (304 while the chain is unchanged).
     """
-    chain = load_chain()
-    alerts = _merge_alert_status(chain.get("chain", []), db)
+    # Dashboard's default view: served from the materialized alert view
+    if unresolved_only and not include_resolution and since_index is None and since_timestamp is None:
+        not_modified = await _cache_headers(request, response, await _view_etag(request, db))
+        return not_modified or await _open_alerts(db)
+
+    not_modified = await _cache_headers(request, response)
+    if not_modified:
+        return not_modified
+
+    blocks = await run_in_threadpool(blocks_since, since_index, since_timestamp)
+    alerts = await _merge_alert_status(blocks, db)
 
     # Filter unresolved alerts
     if unresolved_only:
@@ -65,19 +138,100 @@ def get_all_alerts(
     return alerts
 
 
+@router.get("/stream", summary="Server-Sent Events feed of new alerts and resolutions")
+async def stream_alerts(
+    request: Request,
+    since_index: Optional[int] = Query(None, ge=0, description="Replay blocks after this index first"),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Push issue and resolution blocks as they are added to the chain.
+    Each event's id is the block index; reconnecting clients resume
+    through the Last-Event-ID header or ?since_index.
+    """
+    if last_event_id and last_event_id.isdigit():
+        since_index = int(last_event_id)
+
+    watch_chain_tip()
+    queue = block_feed.subscribe()
+
+    def event(block: Dict) -> str:
+        return f"id: {block['index']}\nevent: {block['type']}\ndata: {json.dumps(_alert_row(block))}\n\n"
+
+    async def backlog(start: int, stop: int):
+        blocks = await run_in_threadpool(lambda: list(iter_blocks(start, stop)))
+        for b in blocks:
+            if b["type"] in ("issue", "resolution"):
+                yield event(b)
+
+    async def events():
+        try:
+            height = await run_in_threadpool(chain_height)
+            last = height - 1 if since_index is None else since_index
+            yield "retry: 3000\n\n"
+            # Resume: replay what the client missed, then follow the feed
+            async for chunk in backlog(last + 1, height):
+                yield chunk
+            last = max(last, height - 1)
+
+            # Blocks of this process's writer and, through the tip watcher,
+            # of other workers all arrive on the queue
+            while not await request.is_disconnected():
+                try:
+                    block = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if block["index"] <= last:
+                    continue
+                if block["index"] > last + 1:
+                    # Blocks dropped by a full queue: re-read them from the ledger
+                    async for chunk in backlog(last + 1, block["index"]):
+                        yield chunk
+                last = block["index"]
+                if block["type"] in ("issue", "resolution"):
+                    yield event(block)
+        finally:
+            block_feed.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/tourist/{temp_id}", summary="Get alerts for a specific tourist temp_id")
-def get_alerts_by_tourist(
+async def get_alerts_by_tourist(
     temp_id: str,
+    request: Request,
+    response: Response,
     unresolved_only: bool = Query(False, description="Return only unresolved alerts"),
     include_resolution: bool = Query(False, description="Include resolution blocks in results"),
-    db: Session = Depends(get_db)
+    since_index: Optional[int] = Query(None, ge=0, description="Only blocks after this index"),
+    since_timestamp: Optional[datetime] = Query(None, description="Only blocks after this time (ISO 8601)"),
+    db: AsyncSession = Depends(get_async_db)
 ) -> List[Dict]:
     """
     Fetch all alerts for a specific tourist temp_id, optionally filtering unresolved ones and resolution blocks.
+    Supports the same since_* parameters and ETag revalidation as GET /alerts/.
     """
-    chain = load_chain()
-    alerts = _merge_alert_status(chain.get("chain", []), db)
-    alerts = [a for a in alerts if a["temp_id"] == temp_id]
+    if unresolved_only and not include_resolution and since_index is None and since_timestamp is None:
+        not_modified = await _cache_headers(request, response, await _view_etag(request, db, temp_id))
+        return not_modified or await _open_alerts(db, temp_id)
+
+    not_modified = await _cache_headers(request, response)
+    if not_modified:
+        return not_modified
+
+    blocks = await run_in_threadpool(blocks_for_temp_id, temp_id)
+    if since_index is not None:
+        blocks = [b for b in blocks if b["index"] > since_index]
+    if since_timestamp is not None:
+        if since_timestamp.tzinfo is None:
+            since_timestamp = since_timestamp.replace(tzinfo=timezone.utc)
+        blocks = [b for b in blocks if datetime.fromisoformat(b["timestamp"]) > since_timestamp]
+    alerts = await _merge_alert_status(blocks, db, scoped=True)
 
     # Filter unresolved alerts
     if unresolved_only:
@@ -90,11 +244,45 @@ def get_alerts_by_tourist(
     return alerts
 
 
+@router.get("/nearby", summary="Open alerts within a radius, nearest first")
+async def get_nearby_alerts(
+    request: Request,
+    response: Response,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10.0, gt=0, le=20000),
+    limit: int = Query(100, ge=1, le=10000),
+    db: AsyncSession = Depends(get_async_db)
+) -> List[Dict]:
+    """
+    Unresolved alerts within radius_km of (lat, lon), ranked by great-circle
+    distance. Served from the spatial index over issue blocks; each row
+    carries distance_km.
+    """
+    not_modified = await _cache_headers(request, response)
+    if not_modified:
+        return not_modified
+
+    # The index can still hold alerts already resolved in the DB (resolve
+    # commits the status before its resolution block), so fetch more until
+    # `limit` open alerts are found or the radius is exhausted
+    fetch = limit
+    while True:
+        hits = await run_in_threadpool(nearby_alerts, lat, lon, radius_km, fetch)
+        alerts = await _merge_alert_status([block for _, block in hits], db, scoped=True)
+        for alert, (distance, _) in zip(alerts, hits):
+            alert["distance_km"] = round(distance, 3)
+        alerts = [a for a in alerts if not a["resolved"]]
+        if len(alerts) >= limit or len(hits) < fetch:
+            return alerts[:limit]
+        fetch *= 2
+
+
 @router.patch("/{alert_uuid}/resolve", summary="Resolve an alert")
-def resolve_alert(
+async def resolve_alert(
     alert_uuid: str,
     resolved_by: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict:
     """
     Mark an alert as resolved. Creates a record if missing.
@@ -104,9 +292,7 @@ def resolve_alert(
         now = datetime.now(timezone.utc)
 
         # --- Update DB ---
-        status: Optional[AlertStatus] = db.query(AlertStatus).filter(
-            AlertStatus.alert_uuid == alert_uuid
-        ).first()
+        status: Optional[AlertStatus] = await db.get(AlertStatus, alert_uuid)
 
         if status:
             status.resolved = True
@@ -121,17 +307,11 @@ def resolve_alert(
             )
             db.add(status)
 
-        db.commit()
-        db.refresh(status)
+        await db.commit()
 
         # --- Append resolution to blockchain ---
-        chain = load_chain()
-        orig_alert = next(
-            (b["data"] for b in chain.get("chain", [])
-             if isinstance(b.get("data"), dict) and b["data"].get("alert_uuid") == alert_uuid),
-            None
-        )
-        temp_id = orig_alert.get("temp_id") if orig_alert else None
+        orig_block = await run_in_threadpool(find_alert_block, alert_uuid)
+        temp_id = orig_block["data"].get("temp_id") if orig_block else None
 
         resolution_data = {
             "alert_uuid": alert_uuid,
@@ -141,7 +321,9 @@ def resolve_alert(
             "resolved_at": now.isoformat()
         }
 
-        new_block = add_block(resolution_data, block_type="resolution")
+        new_block = await add_block_async(resolution_data, block_type="resolution")
+        status.last_block_hash = new_block["hash"]
+        await db.commit()
 
         return {
             "alert_uuid": status.alert_uuid,
@@ -153,5 +335,5 @@ def resolve_alert(
         }
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
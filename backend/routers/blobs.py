@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from blobstore import get_blob, is_digest
+
+router = APIRouter()
+
+# Blobs are immutable: their URL is their content hash
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+# ---------- Download Blob ----------
+@router.get("/{digest}", summary="Download a stored blob (report image) by SHA256 digest")
+def download_blob(digest: str, request: Request):
+    """
+    Serve a blob with long-lived cache headers. Supports If-None-Match
+    and Range requests.
+    """
+    if not is_digest(digest):
+        raise HTTPException(status_code=400, detail="Invalid digest")
+
+    blob = get_blob(digest)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    path, media_type = blob
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -1,60 +1,113 @@
-from fastapi import APIRouter, HTTPException
 import json
-from pathlib import Path
-from blockchain import compute_block_hash, CHAIN_PATH  # shared hash & path
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import Dict, Iterator, Optional
+from blockchain import get_block as read_block, get_chain_cache, iter_blocks, chain_etag  # shared ledger reader
+from chain_audit import ChainInvalid, get_auditor
 
 router = APIRouter()
 
-# ---------- Load Blockchain ----------
-def load_chain() -> dict:
-    if not CHAIN_PATH.exists():
-        return {"chain": []}
-    try:
-        with open(CHAIN_PATH) as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {"chain": []}
-
 
 # ---------- Validate Blockchain ----------
 @router.get("/validate")
-def validate_chain_endpoint():
+def validate_chain_endpoint(
+    full: bool = Query(False, description="Re-verify the whole chain instead of only blocks after the last checkpoint"),
+    headers_only: bool = Query(False, description="With full=true: check hashes and links without re-digesting block data")
+):
     """
-    Validate the blockchain. Returns True if valid, else False.
+    Validate the blockchain. Returns valid=True with the verified checkpoint,
+    or 400 with the first invalid block.
     """
-    chain_data = load_chain()
-    chain = chain_data.get("chain", [])
+    auditor = get_auditor()
+    try:
+        return auditor.validate_full(check_data=not headers_only) if full else auditor.validate()
+    except ChainInvalid as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    for i, block in enumerate(chain):
-        recalculated_hash = compute_block_hash(block)
-        if block["hash"] != recalculated_hash:
-            raise HTTPException(status_code=400, detail=f"Block {i} has invalid hash")
-        if i > 0 and block["prev_hash"] != chain[i-1]["hash"]:
-            raise HTTPException(status_code=400, detail=f"Block {i} prev_hash mismatch")
 
-    return {"valid": True}
+# ---------- List Blocks ----------
+def _select_blocks(start: int, end: Optional[int], block_type: Optional[str],
+                   offset: int, limit: Optional[int], page: Dict) -> Iterator[Dict]:
+    """
+    Yield the requested page of blocks and record the cursor of the next
+    page in page['next_cursor'] once the page is exhausted.
+    """
+    page["next_cursor"] = None
+    skipped = returned = 0
+    for block in iter_blocks(start, end):
+        if block_type and block.get("type") != block_type:
+            continue
+        if skipped < offset:
+            skipped += 1
+            continue
+        if limit is not None and returned >= limit:
+            page["next_cursor"] = block["index"]
+            return
+        returned += 1
+        yield block
 
 
-# ---------- List Blocks ----------
 @router.get("/list")
-def list_blocks_endpoint():
+def list_blocks_endpoint(
+    request: Request,
+    since_index: Optional[int] = Query(None, ge=0, description="Only blocks after this index; overrides start"),
+    start: int = Query(0, ge=0, description="First block index (inclusive)"),
+    end: Optional[int] = Query(None, ge=0, description="Last block index (exclusive)"),
+    cursor: Optional[int] = Query(None, ge=0, description="next_cursor of the previous page; overrides start"),
+    offset: int = Query(0, ge=0, description="Number of matching blocks to skip"),
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="Maximum number of blocks to return"),
+    type: Optional[str] = Query(None, description="Only blocks of this type (genesis, issue, resolution)"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json or ndjson")
+):
     """
-    Return all blocks in the blockchain.
+    Return blocks in the blockchain, optionally paged by cursor/offset,
+    restricted to an index range or filtered by type. Blocks are streamed
+    from the ledger, so even the full chain is never held in one response.
+    JSON responses are {"chain": [...], "next_cursor": int | null}; with
+    format=ndjson one block is written per line. Responses carry an ETag
+    derived from the chain tip; If-None-Match gets a 304 while it is unchanged.
     """
-    chain_data = load_chain()
-    return chain_data
+    etag = chain_etag(request.url.path, request.url.query)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    if since_index is not None:
+        start = since_index + 1
+    page: Dict = {}
+    blocks = _select_blocks(cursor if cursor is not None else start, end, type, offset, limit, page)
+
+    if format == "ndjson":
+        def ndjson():
+            for block in blocks:
+                yield json.dumps(block) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson", headers=headers)
+
+    def body():
+        yield '{"chain": ['
+        for i, block in enumerate(blocks):
+            yield ("," if i else "") + json.dumps(block)
+        yield '], "next_cursor": ' + json.dumps(page["next_cursor"]) + "}"
+
+    return StreamingResponse(body(), media_type="application/json", headers=headers)
 
 
 # ---------- Get Block by Index ----------
 @router.get("/block/{index}")
 def get_block(index: int):
     """
-    Return a specific block by its index.
+    Return a specific block by its index, read from its offset in the ledger.
     """
-    chain_data = load_chain()
-    chain = chain_data.get("chain", [])
-
-    if index < 0 or index >= len(chain):
+    block = read_block(index)
+    if block is None:
         raise HTTPException(status_code=404, detail="Block not found")
+    return block
 
-    return chain[index]
+
+# ---------- Chain Cache Stats ----------
+@router.get("/cache")
+def cache_stats_endpoint():
+    """
+    Return hit/miss counters of the in-process chain cache.
+    """
+    return get_chain_cache().stats()
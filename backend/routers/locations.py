@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from database import get_async_db
+from geo_index import valid_point
+from location_buffer import get_location_buffer
+from models import Tourist
+from schemas import LocationAccepted, LocationBatch, LocationPing
+
+router = APIRouter()
+
+# Largest batch accepted by /locations/batch and longest history window
+MAX_BATCH_PINGS = 10000
+MAX_HISTORY_WINDOW = timedelta(days=31)
+
+
+def _utc(ts: Optional[datetime], now: datetime) -> datetime:
+    """Aware UTC timestamp (naive input is taken as UTC); SQLite stores datetimes without an offset."""
+    if ts is None:
+        return now
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+# ---------- Ingest Pings ----------
+@router.post("/", response_model=LocationAccepted, status_code=202, summary="Report the tourist's current location")
+async def post_location(ping: LocationPing):
+    """Buffered: the position is written to the DB and history on the next flush (LOCATION_FLUSH_INTERVAL)."""
+    if not valid_point(ping.lat, ping.lon):
+        raise HTTPException(status_code=400, detail="lat/lon out of range")
+    get_location_buffer().add(ping.tourist_id, ping.lat, ping.lon, ping.accuracy,
+                              _utc(ping.timestamp, datetime.now(timezone.utc)))
+    return LocationAccepted(accepted=1)
+
+
+@router.post("/batch", response_model=LocationAccepted, status_code=202, summary="Report many location pings at once")
+async def post_locations(batch: LocationBatch):
+    """
+    Accept pings from one or many tourists (e.g. a device uploading points
+    recorded offline). Pings with invalid coordinates are skipped and listed
+    in `rejected`.
+    """
+    if len(batch.pings) > MAX_BATCH_PINGS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_PINGS} pings per request")
+
+    now = datetime.now(timezone.utc)
+    accepted, rejected = [], []
+    for i, p in enumerate(batch.pings):
+        if valid_point(p.lat, p.lon):
+            accepted.append((p.tourist_id, p.lat, p.lon, p.accuracy, _utc(p.timestamp, now)))
+        else:
+            rejected.append(i)
+    get_location_buffer().add_many(accepted)
+    return LocationAccepted(accepted=len(accepted), rejected=rejected)
+
+
+# ---------- Buffer Stats ----------
+@router.get("/stats", summary="Location buffer counters")
+def location_stats() -> Dict:
+    return get_location_buffer().stats()
+
+
+# ---------- Latest Position ----------
+@router.get("/{tourist_id}", summary="Latest known position of a tourist")
+async def get_location(tourist_id: str, db: AsyncSession = Depends(get_async_db)) -> Dict:
+    pending = get_location_buffer().pending_position(tourist_id)
+    if pending is not None:
+        _, lat, lon, accuracy, ts = pending
+        return {"tourist_id": tourist_id, "lat": lat, "lon": lon, "accuracy": accuracy,
+                "timestamp": ts.isoformat(), "pending": True}
+
+    tourist = await db.get(Tourist, tourist_id)
+    if not tourist:
+        raise HTTPException(status_code=404, detail="Tourist not found")
+    return {"tourist_id": tourist_id, "lat": tourist.lat, "lon": tourist.lon, "accuracy": tourist.radius,
+            "timestamp": tourist.location_at.isoformat() if tourist.location_at else None, "pending": False}
+
+
+# ---------- Position History ----------
+@router.get("/{tourist_id}/history", summary="Location history of a tourist")
+async def get_location_history(
+    tourist_id: str,
+    since: Optional[datetime] = Query(None, description="Default: 24 hours before `until`"),
+    until: Optional[datetime] = Query(None, description="Default: now"),
+    limit: int = Query(10000, ge=1, le=100000)
+) -> List[Dict]:
+    now = datetime.now(timezone.utc)
+    until = _utc(until, now)
+    since = _utc(since, until - timedelta(hours=24))
+    if since > until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    if until - since > MAX_HISTORY_WINDOW:
+        raise HTTPException(status_code=400, detail=f"History window is limited to {MAX_HISTORY_WINDOW.days} days")
+    return await run_in_threadpool(get_location_buffer().history, tourist_id, since, until, limit)
@@ -1,23 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models import Tourist, Report
 from pydantic import BaseModel
 from typing import Optional, List
-from blockchain import add_block
+from blockchain import add_block_async
+from blobstore import put_base64
 from datetime import datetime, timezone
-import uuid, traceback
+import logging
+import uuid
+from metrics import ERRORS
 from schemas import PanicReportRequest, PanicReportResponse
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 # ---------- POST /alerts/ ----------
 @router.post("/", response_model=PanicReportResponse, summary="Trigger panic/SOS/report alert")
-def trigger_alert(request: PanicReportRequest, db: Session = Depends(get_db)):
+async def trigger_alert(request: PanicReportRequest, db: AsyncSession = Depends(get_async_db)):
     try:
         # Fetch tourist by permanent ID
-        tourist = db.query(Tourist).filter(Tourist.id == request.tourist_id).first()
+        tourist = await db.get(Tourist, request.tourist_id)
         if not tourist:
             raise HTTPException(status_code=404, detail="Tourist not found")
         
@@ -25,17 +30,21 @@ def trigger_alert(request: PanicReportRequest, db: Session = Depends(get_db)):
         alert_uuid = str(uuid.uuid4())
         timestamp = datetime.now(timezone.utc).isoformat()
 
+        # Base64 images go to the blob store; DB and chain only keep the digest
+        image_digest = await run_in_threadpool(put_base64, request.image) if request.image else None
+        image = None if image_digest else request.image
+
         # If report fields are present, save to DB
         if request.title or request.description or request.image:
             new_report = Report(
                 tourist_id=request.tourist_id,
                 title=request.title or "",
                 description=request.description,
-                image=request.image
+                image=image,
+                image_digest=image_digest
             )
             db.add(new_report)
-            db.commit()
-            db.refresh(new_report)
+            await db.commit()
 
         # Prepare blockchain data
         alert_data = {
@@ -48,13 +57,15 @@ def trigger_alert(request: PanicReportRequest, db: Session = Depends(get_db)):
             "report": {
                 "title": request.title,
                 "description": request.description,
-                "image": request.image
+                "image": image,
+                "image_digest": image_digest
             } if request.title or request.description or request.image else None,
             "timestamp": timestamp
         }
 
-        # Add to blockchain as issue
-        block = add_block(alert_data, block_type="issue")
+        # Add to blockchain as issue; the writer adds its alert view row
+        # (alert_view.watch_alert_view) before this returns
+        block = await add_block_async(alert_data, block_type="issue")
 
         return {
             "alert_uuid": alert_uuid,
@@ -62,9 +73,11 @@ def trigger_alert(request: PanicReportRequest, db: Session = Depends(get_db)):
             "lat": request.lat,
             "lon": request.lon,
             "timestamp": timestamp,
-            "blockchain_hash": block["hash"]
+            "blockchain_hash": block["hash"],
+            "image_digest": image_digest
         }
 
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Alert submission failed")
+        ERRORS.inc(where="panic")
         raise HTTPException(status_code=500, detail=str(e))
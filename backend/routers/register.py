@@ -1,36 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models import Tourist
-from schemas import TouristRegisterRequest, TouristRegisterResponse, UpdateItineraryRequest
-import uuid, qrcode, base64, hashlib
-from io import BytesIO
-import traceback
+from passport_key import normalize_passport
+from passwords import hash_password_async
+from metrics import ERRORS
+from qr_cache import get_qr_cache, is_tourist_id
+from schemas import (
+    BulkRegisterResponse, BulkRegisterResult,
+    TouristRegisterRequest, TouristRegisterResponse, UpdateItineraryRequest,
+)
+from pydantic import ValidationError
+from typing import Dict, List
+import asyncio, csv, io, json, os, zipfile
+import uuid, base64
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# A tourist's QR only encodes the permanent tourist_id, so it never changes
+QR_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Largest group accepted by /register/bulk
+BULK_MAX_ROWS = int(os.getenv("BULK_REGISTER_MAX_ROWS", "1000"))
 
 # ---------- Helper: Generate QR code ----------
 def generate_qr_code(tourist_id: str) -> str:
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(tourist_id)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white").get_image()
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode()
-
-# ---------- Helper: Hash password ----------
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+    return base64.b64encode(get_qr_cache().get_png(tourist_id)).decode()
 
 # ---------- Route: Register New Tourist ----------
 @router.post("/new", response_model=TouristRegisterResponse)
-def register_new_tourist(request: TouristRegisterRequest, db: Session = Depends(get_db)):
+async def register_new_tourist(request: TouristRegisterRequest, db: AsyncSession = Depends(get_async_db)):
     try:
         # Check if passport or email already exists
-        existing = db.query(Tourist).filter(
-            (Tourist.passport == request.passport) | (Tourist.email == request.email)
-        ).first()
+        passport_key = normalize_passport(request.passport)
+        existing = (await db.scalars(select(Tourist).where(
+            (Tourist.passport_key == passport_key) | (Tourist.email == request.email)
+        ))).first()
         if existing:
             raise HTTPException(status_code=400, detail="Passport or email already registered")
 
@@ -39,7 +48,7 @@ def register_new_tourist(request: TouristRegisterRequest, db: Session = Depends(
         temp_id = str(uuid.uuid4())  # temporary anonymized ID
 
         # Hash the password
-        password_hash = hash_password(request.password)
+        password_hash = await hash_password_async(request.password)
 
         # Create new Tourist
         tourist = Tourist(
@@ -48,16 +57,20 @@ def register_new_tourist(request: TouristRegisterRequest, db: Session = Depends(
             email=request.email,
             phone=request.phone,
             passport=request.passport,
+            passport_key=passport_key,
             password=password_hash,
             temp_id=temp_id,
             itinerary=request.itinerary,
         )
 
         db.add(tourist)
-        db.commit()
-        db.refresh(tourist)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Lost a race with a concurrent registration of the same passport/email
+            raise HTTPException(status_code=400, detail="Passport or email already registered")
 
-        qr_code_base64 = generate_qr_code(tourist_id)
+        qr_code_base64 = await get_qr_cache().get_base64_async(tourist_id)
 
         return TouristRegisterResponse(
             tourist_id=tourist_id,
@@ -65,16 +78,168 @@ def register_new_tourist(request: TouristRegisterRequest, db: Session = Depends(
             qr_code_base64=qr_code_base64
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Tourist registration failed")
+        ERRORS.inc(where="register")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ---------- Helper: Parse bulk upload ----------
+async def _read_bulk_rows(request: Request) -> List[Dict]:
+    """Rows from a JSON array body or a CSV body with a header line."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    try:
+        if content_type in ("text/csv", "application/csv"):
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+            rows = [{k.strip(): (v.strip() or None if v is not None else None)
+                     for k, v in row.items() if k} for row in reader]
+        else:
+            rows = json.loads(body or b"null")
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse upload: {e}")
+
+    if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of tourists or a CSV file")
+    if not rows:
+        raise HTTPException(status_code=400, detail="No tourists in upload")
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} tourists per request")
+    return rows
+
+
+def _qr_zip(results: List[BulkRegisterResult], pngs: Dict[str, bytes]) -> bytes:
+    """ZIP with one <tourist_id>.png per created tourist plus a results.csv manifest."""
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(["row", "passport", "tourist_id", "temp_id", "error"])
+    for r in results:
+        writer.writerow([r.row, r.passport or "", r.tourist_id or "", r.temp_id or "", r.error or ""])
+
+    buffered = io.BytesIO()
+    # PNGs are already compressed
+    with zipfile.ZipFile(buffered, "w", compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr("results.csv", manifest.getvalue())
+        for tourist_id, png in pngs.items():
+            zf.writestr(f"{tourist_id}.png", png)
+    return buffered.getvalue()
+
+
+# ---------- Route: Bulk Register (tour groups) ----------
+@router.post("/bulk", response_model=BulkRegisterResponse, summary="Register a group of tourists (JSON array or CSV)")
+async def register_bulk(
+    request: Request,
+    format: str = "json",
+    include_qr: bool = True,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Register up to BULK_REGISTER_MAX_ROWS tourists with one duplicate-check
+    query and one transaction. Invalid or duplicate rows are reported per
+    row and do not stop the others. `format=zip` returns the QR PNGs and a
+    results.csv manifest instead of JSON.
+    """
+    if format not in ("json", "zip"):
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'zip'")
+    rows = await _read_bulk_rows(request)
+
+    results = [BulkRegisterResult(row=i) for i in range(len(rows))]
+    accepted: List[tuple] = []  # (row, request, passport_key)
+    seen_keys, seen_emails = set(), set()
+    for i, row in enumerate(rows):
+        # Attribute assignment is not validated: echo the raw value as a string
+        passport = row.get("passport")
+        results[i].passport = str(passport) if passport is not None else None
+        try:
+            req = TouristRegisterRequest(**row)
+        except ValidationError as e:
+            results[i].error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            continue
+        results[i].passport = req.passport
+        key = normalize_passport(req.passport)
+        if not key:
+            results[i].error = "passport: must not be blank"
+        elif key in seen_keys or req.email in seen_emails:
+            results[i].error = "Passport or email repeated in upload"
+        else:
+            seen_keys.add(key)
+            seen_emails.add(req.email)
+            accepted.append((i, req, key))
+
+    # One query for every duplicate already in the database
+    if accepted:
+        taken = (await db.execute(select(Tourist.passport_key, Tourist.email).where(
+            Tourist.passport_key.in_([key for _, _, key in accepted]) |
+            Tourist.email.in_([req.email for _, req, _ in accepted])
+        ))).all()
+        taken_keys = {k for k, _ in taken}
+        taken_emails = {e for _, e in taken}
+        fresh = []
+        for i, req, key in accepted:
+            if key in taken_keys or req.email in taken_emails:
+                results[i].error = "Passport or email already registered"
+            else:
+                fresh.append((i, req, key))
+        accepted = fresh
+
+    # Hash in the password pool, insert in one transaction
+    password_hashes = await asyncio.gather(*(hash_password_async(req.password) for _, req, _ in accepted))
+    tourists = []
+    for (i, req, key), password_hash in zip(accepted, password_hashes):
+        tourist = Tourist(
+            id=str(uuid.uuid4()),
+            name=req.name,
+            email=req.email,
+            phone=req.phone,
+            passport=req.passport,
+            passport_key=key,
+            password=password_hash,
+            temp_id=str(uuid.uuid4()),
+            itinerary=req.itinerary,
+        )
+        tourists.append(tourist)
+        results[i].tourist_id = tourist.id
+        results[i].temp_id = tourist.temp_id
+
+    if tourists:
+        db.add_all(tourists)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another request registered one of these passports/emails meanwhile
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Some tourists were registered concurrently; retry the upload")
+
+    # Render QR codes concurrently (thread pool, or process pool with QR_WORKERS)
+    cache = get_qr_cache()
+    pngs = {}
+    if tourists and (include_qr or format == "zip"):
+        rendered = await asyncio.gather(*(cache.get_png_async(t.id) for t in tourists))
+        pngs = dict(zip((t.id for t in tourists), rendered))
+        if format == "json":
+            for r in results:
+                if r.tourist_id:
+                    r.qr_code_base64 = base64.b64encode(pngs[r.tourist_id]).decode()
+
+    if format == "zip":
+        archive = await asyncio.get_running_loop().run_in_executor(None, _qr_zip, results, pngs)
+        return Response(content=archive, media_type="application/zip",
+                        headers={"Content-Disposition": 'attachment; filename="tourists.zip"'})
+
+    return BulkRegisterResponse(
+        created=len(tourists),
+        failed=len(results) - len(tourists),
+        results=results,
+    )
+
+
 # ---------- Route: Update Itinerary & Generate New temp_id ----------
 @router.patch("/update_itinerary", response_model=TouristRegisterResponse)
-def update_itinerary(request: UpdateItineraryRequest, db: Session = Depends(get_db)):
+async def update_itinerary(request: UpdateItineraryRequest, db: AsyncSession = Depends(get_async_db)):
     try:
-        tourist = db.query(Tourist).filter(Tourist.id == request.tourist_id).first()
+        tourist = await db.get(Tourist, request.tourist_id)
         if not tourist:
             raise HTTPException(status_code=404, detail="Tourist not found")
 
@@ -83,10 +248,9 @@ def update_itinerary(request: UpdateItineraryRequest, db: Session = Depends(get_
         tourist.temp_id = new_temp_id
         tourist.itinerary = request.itinerary
 
-        db.commit()
-        db.refresh(tourist)
+        await db.commit()
 
-        qr_code_base64 = generate_qr_code(tourist.id)
+        qr_code_base64 = await get_qr_cache().get_base64_async(tourist.id)
 
         return TouristRegisterResponse(
             tourist_id=tourist.id,
@@ -94,6 +258,29 @@ def update_itinerary(request: UpdateItineraryRequest, db: Session = Depends(get_
             qr_code_base64=qr_code_base64
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Itinerary update failed")
+        ERRORS.inc(where="update_itinerary")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ---------- Route: QR Code Image ----------
+@router.get("/{tourist_id}/qr.png", summary="Tourist QR code as a cacheable PNG")
+async def tourist_qr_png(tourist_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    if not is_tourist_id(tourist_id):
+        raise HTTPException(status_code=404, detail="Tourist not found")
+
+    cache = get_qr_cache()
+    png = cache.cached(tourist_id)
+    if png is None:
+        if await db.get(Tourist, tourist_id) is None:
+            raise HTTPException(status_code=404, detail="Tourist not found")
+        png = await cache.get_png_async(tourist_id)
+
+    etag = f'"qr-{tourist_id}"'
+    headers = {"ETag": etag, "Cache-Control": QR_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=png, media_type="image/png", headers=headers)
@@ -1,26 +1,22 @@
-import hashlib
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from database import get_db
+from database import get_async_db
 from models import Tourist
+from passport_key import normalize_passport
+from passwords import hash_password_async, needs_rehash, verify_password_async
 
 router = APIRouter()
 
 
-# ---------- Helper: Hash password ----------
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode("utf-8")).hexdigest()
-
-
 # ---------- Login tourist by passport + password or permanent ID ----------
 @router.get("/login", summary="Login tourist by passport and password")
-def login_tourist(
+async def login_tourist(
     passport: Optional[str] = Query(None),
     password: Optional[str] = Query(None),
     tourist_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Login tourist using either passport number + password, or tourist_id.
@@ -29,11 +25,10 @@ def login_tourist(
     if not ((passport and password) or tourist_id):
         raise HTTPException(status_code=400, detail="Provide passport + password or tourist_id")
     
-    query = db.query(Tourist)
-    
     if passport and password:
-        passport_clean = passport.strip().upper()
-        tourist = query.filter(func.upper(func.trim(Tourist.passport)) == passport_clean).first()
+        tourist = (await db.scalars(
+            select(Tourist).where(Tourist.passport_key == normalize_passport(passport))
+        )).first()
         if not tourist:
             raise HTTPException(status_code=404, detail="Tourist not found")
 
@@ -41,11 +36,16 @@ def login_tourist(
         if not tourist.password:
             raise HTTPException(status_code=400, detail="Password not set for this tourist")
 
-        if tourist.password != hash_password(password):
+        if not await verify_password_async(password, tourist.password):
             raise HTTPException(status_code=401, detail="Invalid password")
+
+        # Upgrade legacy SHA-256 (or outdated cost) hashes now that we have the plaintext
+        if needs_rehash(tourist.password):
+            tourist.password = await hash_password_async(password)
+            await db.commit()
     elif tourist_id:
         tourist_id_clean = tourist_id.strip()
-        tourist = query.filter(Tourist.id == tourist_id_clean).first()
+        tourist = await db.get(Tourist, tourist_id_clean)
         if not tourist:
             raise HTTPException(status_code=404, detail="Tourist not found")
     else:
@@ -64,15 +64,15 @@ def login_tourist(
 
 # ---------- Fetch tourist profile by permanent ID ----------
 @router.get("/{tourist_id}", summary="Get tourist profile by ID")
-def get_tourist_profile(
+async def get_tourist_profile(
     tourist_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get tourist profile by permanent ID.
     Returns: name, passport, temp_id, itinerary, phone, resolved
     """
-    tourist = db.query(Tourist).filter(Tourist.id == tourist_id).first()
+    tourist = await db.get(Tourist, tourist_id)
     if not tourist:
         raise HTTPException(status_code=404, detail="Tourist not found")
     
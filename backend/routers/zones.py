@@ -0,0 +1,144 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from database import get_async_db
+from models import Zone, ZoneKind
+from schemas import ZoneCheckRequest, ZoneCheckResponse, ZoneCreate, ZoneResponse, ZoneUpdate
+from zone_engine import evaluate_positions, zone_geometry, zone_index_cache
+
+router = APIRouter()
+
+# Largest batch accepted by /zones/check
+MAX_CHECK_POSITIONS = 100000
+
+# ZoneUpdate fields that cannot be set to null
+NOT_NULL_FIELDS = ("name", "kind", "active")
+
+
+def _zone_kind(kind: str) -> ZoneKind:
+    try:
+        return ZoneKind(kind)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {[k.value for k in ZoneKind]}")
+
+
+def _zone_row(zone: Zone) -> ZoneResponse:
+    return ZoneResponse(
+        id=zone.id,
+        name=zone.name,
+        kind=zone.kind.value,
+        lat=zone.lat,
+        lon=zone.lon,
+        radius=zone.radius,
+        polygon=json.loads(zone.polygon) if zone.polygon else None,
+        active=zone.active,
+    )
+
+
+def _set_geometry(zone: Zone, lat, lon, radius, polygon) -> None:
+    try:
+        zone.lat, zone.lon, zone.radius, vertices = zone_geometry(lat, lon, radius, polygon)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    zone.polygon = json.dumps(vertices) if vertices else None
+
+
+# ---------- Create Zone ----------
+@router.post("/", response_model=ZoneResponse, summary="Create a geofence zone (circle or polygon)")
+async def create_zone(request: ZoneCreate, db: AsyncSession = Depends(get_async_db)):
+    zone = Zone(name=request.name, kind=_zone_kind(request.kind), active=request.active)
+    _set_geometry(zone, request.lat, request.lon, request.radius, request.polygon)
+    db.add(zone)
+    await db.commit()
+    zone_index_cache.invalidate()
+    return _zone_row(zone)
+
+
+# ---------- List Zones ----------
+@router.get("/", response_model=List[ZoneResponse], summary="List geofence zones")
+async def list_zones(
+    kind: Optional[str] = Query(None, description="Only zones of this kind"),
+    active_only: bool = Query(True),
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(Zone).order_by(Zone.created_at, Zone.id)
+    if kind:
+        query = query.where(Zone.kind == _zone_kind(kind))
+    if active_only:
+        query = query.where(Zone.active.is_(True))
+    return [_zone_row(z) for z in await db.scalars(query)]
+
+
+# ---------- Batched Point-in-Zone Check ----------
+@router.post("/check", response_model=ZoneCheckResponse, summary="Zones containing each of a batch of positions")
+async def check_positions(request: ZoneCheckRequest):
+    """
+    Evaluate many positions (e.g. the latest location ping of every active
+    tourist) against all active zones in one call.
+    """
+    if len(request.positions) > MAX_CHECK_POSITIONS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_CHECK_POSITIONS} positions per request")
+    if request.kinds:
+        for kind in request.kinds:
+            _zone_kind(kind)
+
+    points = [(p.lat, p.lon) for p in request.positions]
+    matches = await run_in_threadpool(evaluate_positions, points, request.kinds)
+    return ZoneCheckResponse(results=[
+        {"id": p.id, "zones": [{"id": z["id"], "name": z["name"], "kind": z["kind"]} for z in zones]}
+        for p, zones in zip(request.positions, matches)
+    ])
+
+
+# ---------- Get / Update / Delete Zone ----------
+@router.get("/{zone_id}", response_model=ZoneResponse, summary="Get a geofence zone")
+async def get_zone(zone_id: str, db: AsyncSession = Depends(get_async_db)):
+    zone = await db.get(Zone, zone_id)
+    if not zone:
+        raise HTTPException(status_code=404, detail="Zone not found")
+    return _zone_row(zone)
+
+
+@router.patch("/{zone_id}", response_model=ZoneResponse, summary="Update a geofence zone")
+async def update_zone(zone_id: str, request: ZoneUpdate, db: AsyncSession = Depends(get_async_db)):
+    zone = await db.get(Zone, zone_id)
+    if not zone:
+        raise HTTPException(status_code=404, detail="Zone not found")
+
+    changes = request.model_dump(exclude_unset=True)
+    # Only polygon may be cleared; null for a NOT NULL column is a bad request, not a 500
+    nulls = [field for field in NOT_NULL_FIELDS if field in changes and changes[field] is None]
+    if nulls:
+        raise HTTPException(status_code=400, detail=f"{', '.join(nulls)} cannot be null")
+    if "name" in changes:
+        zone.name = changes["name"]
+    if "kind" in changes:
+        zone.kind = _zone_kind(changes["kind"])
+    if "active" in changes:
+        zone.active = changes["active"]
+    if changes.keys() & {"lat", "lon", "radius", "polygon"}:
+        if "polygon" in changes:
+            # Switching shape: a polygon replaces the circle, polygon=null turns it back into one
+            polygon = changes["polygon"]
+        else:
+            polygon = json.loads(zone.polygon) if zone.polygon else None
+        _set_geometry(zone, changes.get("lat", zone.lat), changes.get("lon", zone.lon),
+                      changes.get("radius", zone.radius), polygon)
+
+    await db.commit()
+    zone_index_cache.invalidate()
+    return _zone_row(zone)
+
+
+@router.delete("/{zone_id}", status_code=204, summary="Delete a geofence zone")
+async def delete_zone(zone_id: str, db: AsyncSession = Depends(get_async_db)):
+    zone = await db.get(Zone, zone_id)
+    if not zone:
+        raise HTTPException(status_code=404, detail="Zone not found")
+    await db.delete(zone)
+    await db.commit()
+    zone_index_cache.invalidate()
+    return Response(status_code=204)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 # ==========================
@@ -20,6 +20,21 @@ class TouristRegisterResponse(BaseModel):
     qr_code_base64: str
 
 
+class BulkRegisterResult(BaseModel):
+    row: int  # 0-based position in the uploaded array / CSV data rows
+    passport: Optional[str] = None
+    tourist_id: Optional[str] = None
+    temp_id: Optional[str] = None
+    qr_code_base64: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkRegisterResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkRegisterResult]
+
+
 # ==========================
 # Itinerary Update
 # ==========================
@@ -82,19 +97,90 @@ class PanicReportResponse(BaseModel):
     lon: float
     timestamp: str
     blockchain_hash: str
+    image_digest: Optional[str] = None  # fetch via /blobs/{image_digest}
+
+
+# ==========================
+# Location Pings
+# ==========================
+class LocationPing(BaseModel):
+    tourist_id: str
+    lat: float
+    lon: float
+    accuracy: Optional[float] = None  # meters, stored as Tourist.radius
+    timestamp: Optional[datetime] = None  # device time; server time when omitted
+
+
+class LocationBatch(BaseModel):
+    pings: List[LocationPing]
+
+
+class LocationAccepted(BaseModel):
+    accepted: int
+    rejected: List[int] = []  # positions in the batch with invalid coordinates
 
 
 # ==========================
 # GeoFence Zones
 # ==========================
+class ZoneCreate(BaseModel):
+    name: str
+    kind: str = "restricted"  # restricted | danger | safe
+    # Either a circle (lat, lon, radius in meters) or a polygon of [lat, lon] vertices
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    radius: Optional[float] = None
+    polygon: Optional[List[List[float]]] = None
+    active: bool = True
+
+
+class ZoneUpdate(BaseModel):
+    name: Optional[str] = None
+    kind: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    radius: Optional[float] = None
+    polygon: Optional[List[List[float]]] = None
+    active: Optional[bool] = None
+
+
 class ZoneResponse(BaseModel):
     id: str
     name: str
     lat: float
     lon: float
     radius: float
+    kind: str = "restricted"
+    polygon: Optional[List[List[float]]] = None
+    active: bool = True
 
     # Pydantic v2 replacement for orm_mode
     model_config = {
         "from_attributes": True
     }
+
+
+class ZonePosition(BaseModel):
+    id: str  # tourist_id, temp_id or any caller-chosen key
+    lat: float
+    lon: float
+
+
+class ZoneCheckRequest(BaseModel):
+    positions: List[ZonePosition]
+    kinds: Optional[List[str]] = None  # only report zones of these kinds
+
+
+class ZoneMatch(BaseModel):
+    id: str
+    name: str
+    kind: str
+
+
+class ZoneCheckResult(BaseModel):
+    id: str
+    zones: List[ZoneMatch]
+
+
+class ZoneCheckResponse(BaseModel):
+    results: List[ZoneCheckResult]
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from metrics import ERRORS, gauge
+
+logger = logging.getLogger(__name__)
+
+# 'background': serve at once and warm caches in the background (/ready
+# reports 503 until done); 'blocking': warm up before serving; 'off': load
+# everything lazily on first use
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background")
+
+WARMUP_MODES = ("background", "blocking", "off")
+
+
+# ---------- Startup State ----------
+class StartupState:
+    """
+    Duration of each startup phase and whether the app is ready to serve.
+    Times are measured from the import of this module, which main imports
+    before anything else.
+    """
+
+    def __init__(self):
+        self.began = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.ready = False
+        self.seconds_to_ready: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(time.perf_counter() - t0, 4)
+
+    def starting(self) -> None:
+        """Called as the app starts: records the import time (first start only) and clears readiness."""
+        self.phases.setdefault("import", round(time.perf_counter() - self.began, 4))
+        self.ready = False
+
+    def mark_ready(self) -> None:
+        self.seconds_to_ready = round(time.perf_counter() - self.began, 4)
+        self.ready = True
+        logger.info("Ready %.3fs after start (%s)", self.seconds_to_ready,
+                    ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.phases.items()))
+
+    def status(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "seconds_to_ready": self.seconds_to_ready,
+            "phases": dict(self.phases),
+            "warmup": STARTUP_WARMUP,
+            "error": self.error,
+        }
+
+
+STARTUP = StartupState()
+
+gauge("app_ready", "1 once startup and warm-up have finished", fn=lambda: int(STARTUP.ready))
+gauge("startup_phase_seconds", "Duration of each startup phase", ("phase",),
+      fn=lambda: {(name,): seconds for name, seconds in STARTUP.phases.items()})
+
+
+# ---------- Warm-up ----------
+def _warm_up_sync() -> None:
+    from sqlalchemy import text
+    from blockchain import get_chain_cache
+    from database import engine
+    from qr_cache import warm_renderer
+
+    # Opens the ledger (genesis/legacy import on a new install), then loads
+    # the chain snapshot, the blocks after it and their indexes
+    with STARTUP.phase("warm_chain"):
+        get_chain_cache().refresh()
+    with STARTUP.phase("warm_db"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    with STARTUP.phase("warm_qr"):
+        warm_renderer()
+
+
+async def warm_up() -> None:
+    """Load the chain cache and indexes, open DB connections and load the QR renderer."""
+    from sqlalchemy import text
+    from starlette.concurrency import run_in_threadpool
+    from database import async_engine
+
+    try:
+        await run_in_threadpool(_warm_up_sync)
+        with STARTUP.phase("warm_async_db"):
+            async with async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        # Not fatal: whatever failed to warm up is loaded by the first request
+        logger.exception("Warm-up failed")
+        ERRORS.inc(where="warmup")
+        STARTUP.error = str(e)
+    STARTUP.mark_ready()
+
+
+async def start_warmup(mode: str = STARTUP_WARMUP) -> Optional[asyncio.Task]:
+    """Warm up according to `mode`; returns the task of a background warm-up."""
+    if mode not in WARMUP_MODES:
+        raise ValueError(f"Unknown STARTUP_WARMUP '{mode}', expected one of {WARMUP_MODES}")
+    if mode == "off":
+        STARTUP.mark_ready()
+        return None
+    if mode == "blocking":
+        await warm_up()
+        return None
+    return asyncio.create_task(warm_up())
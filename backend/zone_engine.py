@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from database import SessionLocal
+from geo_index import GEO_CELL_DEG, cell_of, cell_span, haversine_km, haversine_pairs_km, np, valid_point
+from models import Zone
+
+# Seconds a built zone index is reused before re-reading the zones table.
+# Zone edits in this process invalidate it immediately; other workers see
+# them within this interval.
+ZONE_INDEX_TTL = float(os.getenv("ZONE_INDEX_TTL", "5"))
+
+# Zones spanning more cells than this are checked against every position
+# instead of being registered cell by cell
+ZONE_MAX_CELLS = int(os.getenv("ZONE_MAX_CELLS", "10000"))
+
+
+# ---------- Geometry ----------
+def zone_geometry(lat: Optional[float], lon: Optional[float], radius: Optional[float],
+                  polygon: Optional[List[List[float]]]) -> Tuple[float, float, float, Optional[List[List[float]]]]:
+    """
+    Normalize a zone definition to (lat, lon, radius_m, polygon). Polygon
+    zones get their vertex centroid and the radius of a circle enclosing
+    every vertex. Raises ValueError for an incomplete or invalid shape.
+    """
+    if polygon:
+        if len(polygon) < 3 or any(len(v) != 2 or not valid_point(v[0], v[1]) for v in polygon):
+            raise ValueError("polygon needs at least 3 [lat, lon] vertices")
+        c_lat = sum(v[0] for v in polygon) / len(polygon)
+        c_lon = sum(v[1] for v in polygon) / len(polygon)
+        distances = haversine_km(c_lat, c_lon, [v[0] for v in polygon], [v[1] for v in polygon])
+        return c_lat, c_lon, max(distances) * 1000, [[float(v[0]), float(v[1])] for v in polygon]
+
+    if lat is None or lon is None or radius is None:
+        raise ValueError("a zone needs lat, lon and radius, or a polygon")
+    if not valid_point(lat, lon):
+        raise ValueError("lat/lon out of range")
+    if radius <= 0:
+        raise ValueError("radius must be positive")
+    return lat, lon, radius, None
+
+
+def points_in_polygon(lats: Sequence[float], lons: Sequence[float], vertices: Sequence[Sequence[float]]) -> List[bool]:
+    """Even-odd ray casting of many points against one polygon, in lat/lon as planar coordinates."""
+    if np is not None:
+        y = np.asarray(lats, dtype=np.float64)[:, None]
+        x = np.asarray(lons, dtype=np.float64)[:, None]
+        vy = np.asarray([v[0] for v in vertices], dtype=np.float64)
+        vx = np.asarray([v[1] for v in vertices], dtype=np.float64)
+        wy, wx = np.roll(vy, -1), np.roll(vx, -1)
+        straddles = (vy > y) != (wy > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = vx + (y - vy) * (wx - vx) / (wy - vy)
+        crossings = np.count_nonzero(straddles & (x < x_cross), axis=1)
+        return (crossings % 2 == 1).tolist()
+
+    edges = list(zip(vertices, list(vertices[1:]) + [vertices[0]]))
+    inside = []
+    for y, x in zip(lats, lons):
+        odd = False
+        for (vy, vx), (wy, wx) in edges:
+            if (vy > y) != (wy > y) and x < vx + (y - vy) * (wx - vx) / (wy - vy):
+                odd = not odd
+        inside.append(odd)
+    return inside
+
+
+# ---------- Zone Index ----------
+class ZoneIndex:
+    """
+    Immutable index of zones for batched point-in-zone checks. Each zone is
+    registered in every grid cell its bounding circle overlaps, so a
+    position only meets the zones of its own cell. Candidates are confirmed
+    with one vectorized haversine pass, and polygon zones with a ray cast.
+    """
+
+    def __init__(self, zones: Iterable[Dict], cell_deg: float = GEO_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.zones: List[Dict] = list(zones)
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._wide: List[int] = []
+
+        for i, zone in enumerate(self.zones):
+            rows, cols = cell_span(zone["lat"], zone["lon"], zone["radius"] / 1000, cell_deg)
+            if len(rows) * len(cols) > ZONE_MAX_CELLS:
+                self._wide.append(i)
+                continue
+            for r in rows:
+                for c in cols:
+                    self._cells.setdefault((r, c), []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    def evaluate(self, positions: Sequence[Tuple[float, float]],
+                 kinds: Optional[Iterable[str]] = None) -> List[List[Dict]]:
+        """For each (lat, lon), the zones containing it (optionally only of `kinds`)."""
+        kinds = set(kinds) if kinds else None
+        pos_ix: List[int] = []
+        zone_ix: List[int] = []
+        for p, (lat, lon) in enumerate(positions):
+            for z in self._cells.get(cell_of(lat, lon, self.cell_deg), ()):
+                pos_ix.append(p)
+                zone_ix.append(z)
+            for z in self._wide:
+                pos_ix.append(p)
+                zone_ix.append(z)
+
+        matches: List[List[Dict]] = [[] for _ in positions]
+        if not pos_ix:
+            return matches
+
+        zones = self.zones
+        distances = haversine_pairs_km(
+            [positions[p][0] for p in pos_ix], [positions[p][1] for p in pos_ix],
+            [zones[z]["lat"] for z in zone_ix], [zones[z]["lon"] for z in zone_ix],
+        )
+
+        # Inside the circle; polygon zones are confirmed per zone in one batch
+        by_polygon: Dict[int, List[int]] = {}
+        for p, z, d in zip(pos_ix, zone_ix, distances):
+            zone = zones[z]
+            if d * 1000 > zone["radius"] or (kinds is not None and zone["kind"] not in kinds):
+                continue
+            if zone["polygon"]:
+                by_polygon.setdefault(z, []).append(p)
+            else:
+                matches[p].append(zone)
+
+        for z, ps in by_polygon.items():
+            inside = points_in_polygon([positions[p][0] for p in ps], [positions[p][1] for p in ps],
+                                       zones[z]["polygon"])
+            for p, hit in zip(ps, inside):
+                if hit:
+                    matches[p].append(zones[z])
+        return matches
+
+    def stats(self) -> Dict:
+        return {
+            "zones": len(self.zones),
+            "cells": len(self._cells),
+            "wide_zones": len(self._wide),
+            "cell_deg": self.cell_deg,
+            "vectorized": np is not None,
+        }
+
+
+def zone_entry(zone: Zone) -> Dict:
+    """Plain-dict form of a Zone row as used by ZoneIndex."""
+    return {
+        "id": zone.id,
+        "name": zone.name,
+        "kind": zone.kind.value if hasattr(zone.kind, "value") else zone.kind,
+        "lat": zone.lat,
+        "lon": zone.lon,
+        "radius": zone.radius,
+        "polygon": json.loads(zone.polygon) if zone.polygon else None,
+    }
+
+
+# ---------- Cached Index of Active Zones ----------
+class ZoneIndexCache:
+    """Builds the ZoneIndex of active zones from the database and reuses it for ttl seconds."""
+
+    def __init__(self, ttl: float = ZONE_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._index: Optional[ZoneIndex] = None
+        self._built_at = 0.0
+
+    def get(self) -> ZoneIndex:
+        with self._lock:
+            if self._index is None or time.monotonic() - self._built_at >= self.ttl:
+                with SessionLocal() as db:
+                    rows = db.scalars(select(Zone).where(Zone.active.is_(True))).all()
+                    self._index = ZoneIndex(zone_entry(z) for z in rows)
+                self._built_at = time.monotonic()
+            return self._index
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._index = None
+
+
+zone_index_cache = ZoneIndexCache()
+
+
+def evaluate_positions(positions: Sequence[Tuple[float, float]],
+                       kinds: Optional[Iterable[str]] = None) -> List[List[Dict]]:
+    """Zones containing each (lat, lon), using the cached index of active zones."""
+    return zone_index_cache.get().evaluate(positions, kinds)
@@ -1,3 +1,47 @@
+const PAGE_SIZE = 100;
+let nextCursor = null;
+
+/** Render one page of blocks into #blocks */
+function renderBlocks(out, chain) {
+  chain.forEach(block => {
+    const idx = block.index ?? '—';
+    const ts = block.timestamp ?? '—';
+    const hash = block.hash ?? '—';
+    const prev = block.prev_hash ?? '—';
+    const dataPretty = JSON.stringify(block.data ?? {}, null, 2);
+
+    const card = document.createElement('div');
+    card.className = 'card mb-2';
+    card.style.padding = '12px';
+    card.innerHTML = `
+      <div><strong>Index:</strong> ${idx}</div>
+      <div><strong>Timestamp:</strong> ${ts}</div>
+      <div><strong>Hash:</strong> <code>${hash}</code></div>
+      <div><strong>Prev Hash:</strong> <code>${prev}</code></div>
+      <pre style="white-space:pre-wrap;margin-top:8px;">${dataPretty}</pre>
+    `;
+    out.appendChild(card);
+  });
+}
+
+/** Fetch the next page of blocks (cursor-based) */
+async function loadMoreBlocks() {
+  const out = document.getElementById('blocks');
+  const moreBtn = document.getElementById('moreBtn');
+  let path = `/blockchain/list?limit=${PAGE_SIZE}`;
+  if (nextCursor !== null) path += `&cursor=${nextCursor}`;
+
+  const res = await fetch(path);
+  if (!res.ok) throw new Error(`Failed to load blockchain: ${res.status}`);
+  const data = await res.json();
+  const chain = data && Array.isArray(data.chain) ? data.chain : [];
+
+  renderBlocks(out, chain);
+  nextCursor = data.next_cursor ?? null;
+  if (moreBtn) moreBtn.classList.toggle('d-none', nextCursor === null);
+  return chain.length;
+}
+
 async function loadBlockchain() {
   const out = document.getElementById('blocks');
   const status = document.getElementById('blockchainStatus');
@@ -23,38 +67,14 @@ async function loadBlockchain() {
       status.className = 'mb-3 text-danger fw-bold';
     }
 
-    // 2️⃣ Load blocks
-    const res = await fetch('/blockchain/list');
-    if (!res.ok) throw new Error(`Failed to load blockchain: ${res.status}`);
-    const data = await res.json();
-    const chain = data && Array.isArray(data.chain) ? data.chain : [];
-
+    // 2️⃣ Load first page of blocks
     out.innerHTML = '';
-    if (chain.length === 0) {
+    nextCursor = null;
+    const count = await loadMoreBlocks();
+    if (count === 0) {
       out.textContent = 'No blocks available.';
-      return;
     }
 
-    chain.forEach(block => {
-      const idx = block.index ?? '—';
-      const ts = block.timestamp ?? '—';
-      const hash = block.hash ?? '—';
-      const prev = block.prev_hash ?? '—';
-      const dataPretty = JSON.stringify(block.data ?? {}, null, 2);
-
-      const card = document.createElement('div');
-      card.className = 'card mb-2';
-      card.style.padding = '12px';
-      card.innerHTML = `
-        <div><strong>Index:</strong> ${idx}</div>
-        <div><strong>Timestamp:</strong> ${ts}</div>
-        <div><strong>Hash:</strong> <code>${hash}</code></div>
-        <div><strong>Prev Hash:</strong> <code>${prev}</code></div>
-        <pre style="white-space:pre-wrap;margin-top:8px;">${dataPretty}</pre>
-      `;
-      out.appendChild(card);
-    });
-
   } catch (err) {
     console.error(err);
     status.textContent = `❌ Error: ${err.message}`;
@@ -68,4 +88,6 @@ document.addEventListener('DOMContentLoaded', () => {
   loadBlockchain();
   const btn = document.getElementById('loadBtn');
   if (btn) btn.addEventListener('click', loadBlockchain);
+  const moreBtn = document.getElementById('moreBtn');
+  if (moreBtn) moreBtn.addEventListener('click', () => loadMoreBlocks().catch(err => console.error(err)));
 });
@@ -1,5 +1,10 @@
 let map;
 const markers = {};
+let currentAlerts = new Map();
+let pollTimer = null;
+
+const POLL_INTERVAL = 15000;     // fallback when the event stream is unavailable
+const RESYNC_INTERVAL = 120000;  // full refresh while streaming, as a safety net
 
 /** Initialize Leaflet map */
 function ensureMap() {
@@ -39,6 +44,7 @@ async function fetchAlerts() {
         if (!Array.isArray(rawData)) throw new Error("Invalid API response");
 
         const alerts = processAndConsolidateAlerts(rawData);
+        currentAlerts = new Map(alerts.map(a => [a.alert_uuid, a]));
         updateDashboard(alerts);
     } catch (err) {
         console.error('Failed to fetch alerts:', err);
@@ -51,6 +57,54 @@ async function fetchAlerts() {
     }
 }
 
+/** Apply one pushed issue/resolution event to the current alert set */
+function applyAlertEvent(record) {
+    if (!record?.alert_uuid) return;
+    const existing = currentAlerts.get(record.alert_uuid);
+    if (record.type === 'resolution') {
+        if (!existing) return;
+        currentAlerts.set(record.alert_uuid, {
+            ...existing,
+            resolved: true,
+            resolved_by: record.resolved_by,
+            resolved_at: record.resolved_at
+        });
+    } else {
+        currentAlerts.set(record.alert_uuid, { ...existing, ...record });
+    }
+
+    const filter = document.getElementById('resolvedFilter')?.value;
+    let alerts = Array.from(currentAlerts.values());
+    if (filter === 'unresolved') alerts = alerts.filter(a => !a.resolved);
+    if (filter === 'resolved') alerts = alerts.filter(a => a.resolved);
+    updateDashboard(alerts);
+}
+
+/** Subscribe to the server-sent alert feed, falling back to polling */
+function subscribeAlerts() {
+    if (!window.EventSource) {
+        pollTimer = setInterval(fetchAlerts, POLL_INTERVAL);
+        return;
+    }
+
+    const source = new EventSource('/alerts/stream');
+    const onEvent = e => applyAlertEvent(JSON.parse(e.data));
+    source.addEventListener('issue', onEvent);
+    source.addEventListener('resolution', onEvent);
+    source.onopen = () => {
+        if (pollTimer) {
+            clearInterval(pollTimer);
+            pollTimer = null;
+            fetchAlerts();
+        }
+    };
+    source.onerror = () => {
+        // EventSource reconnects on its own (resuming via Last-Event-ID); poll meanwhile
+        if (!pollTimer) pollTimer = setInterval(fetchAlerts, POLL_INTERVAL);
+    };
+    setInterval(fetchAlerts, RESYNC_INTERVAL);
+}
+
 /** Update table and map markers */
 function updateDashboard(alerts) {
     const tbody = document.getElementById('alertsTableBody');
@@ -151,7 +205,7 @@ async function resolveAlert(alertId) {
 document.addEventListener('DOMContentLoaded', () => {
     ensureMap();
     fetchAlerts();
-    setInterval(fetchAlerts, 15000);
+    subscribeAlerts();
     document.getElementById('refreshBtn')?.addEventListener('click', fetchAlerts);
     document.getElementById('resolvedFilter')?.addEventListener('change', fetchAlerts);
 });
\ No newline at end of file